@@ -0,0 +1,145 @@
+"""Enemy decision-making (flow fields, path planning) off the main thread
+
+Simulation hands the worker an immutable AISnapshot each tick. The worker
+works out where every enemy should head (an intent) and publishes a new,
+never-modified set of intents that Simulation reads without taking a lock;
+enemy movement and collisions stay on the main thread.
+
+In "thread" mode enemies act on intents up to MAX_INTENT_AGE ticks old;
+while the worker is further behind than that (e.g. when ticks run back to
+back) they use their simple movement instead. Either way games are not
+reproducible. "lockstep" mode computes the intents in the calling thread
+before they are used and gives exactly the same games as planning inline
+(see tests/test_ai_worker.py).
+"""
+import os
+import threading
+from collections import namedtuple
+
+# Only pygame.Rect is needed, so keep its banner quiet
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+AI_INLINE = "inline"  # Plan inside Simulation.step (no worker)
+AI_THREAD = "thread"  # Plan on a background thread
+AI_LOCKSTEP = "lockstep"  # Plan through the worker, but synchronously
+AI_MODES = (AI_INLINE, AI_THREAD, AI_LOCKSTEP)
+
+# Intents planned more than this many ticks ago are ignored
+MAX_INTENT_AGE = 2
+
+# State the worker plans from. enemies holds (enemy, x, y) for the enemies
+# to plan for this tick; the Enemy objects are only used as keys. roster is
+# every enemy of the game, in order, and changes only when game does.
+PlayerState = namedtuple("PlayerState", "x y dx dy")
+AISnapshot = namedtuple("AISnapshot", "game tick player power_up_active enemies roster")
+
+# One tick's published intents; intents maps enemy -> (scared, (target_x, target_y) or None)
+# and is never changed once published
+PublishedIntents = namedtuple("PublishedIntents", "game tick intents")
+
+class IntentReader:
+    """Stands in for the flow field in Enemy.update, answering from one enemy's intent
+
+    An intent made for the other mode (the power-up started or ended after
+    the snapshot) gives None, so the enemy falls back to its simple movement.
+    """
+    __slots__ = ("intent",)
+
+    def __init__(self):
+        self.intent = None
+
+    def chase_target(self, x, y):
+        intent = self.intent
+        if intent is None or intent[0]:
+            return None
+        return intent[1]
+
+    def flee_target(self, x, y):
+        intent = self.intent
+        if intent is None or not intent[0]:
+            return None
+        return intent[1]
+
+class AIWorker:
+    """Plans enemy moves from snapshots and publishes them for the main thread
+
+    The worker owns the flow field and the optional EnemyDirector; nothing
+    else may touch them once it is running. The main thread calls submit()
+    and then reads intents(). Every plan is published as a fresh
+    PublishedIntents that the worker never writes to again, so publishing
+    is a single reference assignment and a reader can keep what it got for
+    as long as it likes without taking a lock.
+    """
+    def __init__(self, flow_field, director=None, threaded=True):
+        self.flow_field = flow_field
+        self.director = director
+        self.threaded = threaded
+        self._published = PublishedIntents(None, -1, {})
+        self._game = None
+
+        # Snapshot mailbox: only the newest unplanned snapshot is kept
+        self._condition = threading.Condition()
+        self._snapshot = None
+        self._stopping = False
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name="enemy-ai", daemon=True)
+            self._thread.start()
+
+    def submit(self, snapshot):
+        """Ask for intents for a snapshot (planned right away in lockstep mode)"""
+        if not self.threaded:
+            self._plan(snapshot)
+            return
+        with self._condition:
+            self._snapshot = snapshot
+            self._condition.notify()
+
+    def intents(self):
+        """The most recently published PublishedIntents"""
+        return self._published
+
+    def close(self):
+        """Stop the worker thread"""
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        condition = self._condition
+        while True:
+            with condition:
+                while self._snapshot is None and not self._stopping:
+                    condition.wait()
+                if self._stopping:
+                    return
+                snapshot = self._snapshot
+                self._snapshot = None
+            self._plan(snapshot)
+
+    def _plan(self, snapshot):
+        """Work out intents for a snapshot and publish them"""
+        player = snapshot.player
+        flow_field = self.flow_field
+        director = self.director
+        if director is not None and snapshot.game != self._game:
+            director.reset(snapshot.roster)
+        self._game = snapshot.game
+
+        flow_field.update(player.x, player.y)
+        if director is not None:
+            director.begin_tick(player)
+
+        intents = {}
+        scared = snapshot.power_up_active
+        for enemy, x, y in snapshot.enemies:
+            navigator = flow_field if director is None else director.navigator(enemy)
+            if scared:
+                intents[enemy] = (True, navigator.flee_target(x, y))
+            else:
+                intents[enemy] = (False, navigator.chase_target(x, y))
+        self._published = PublishedIntents(snapshot.game, snapshot.tick, intents)
@@ -0,0 +1,210 @@
+"""Play many headless games in parallel to tune the game balance
+
+Every combination of the given settings is played --games times, one seed
+per game, spread over a process pool:
+
+    python batch_runner.py --games 1000 --enemy-speed 3.0 3.2 3.4
+    python batch_runner.py --games 500 --bot random --scared-speed 2.0 2.5 --power-up-duration 5 10
+
+Results stream into the --output directory as one binary file per column
+while games finish (see ColumnWriter), and load_results() maps them back as
+NumPy arrays. A summary per setting is printed at the end.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+# Workers only need pygame.Rect, so keep its banner out of every process
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+from simulation import Simulation, EVENT_GEM, EVENT_POWER_UP, EVENT_ENEMY_EATEN, EVENT_PLAYER_CAUGHT
+from game_map import GameMap
+from map_cache import MapCache
+from bots import BOTS, make_bot
+
+# Result columns and their on-disk types
+RESULT_COLUMNS = (
+    ("game_id", "<i8"),
+    ("seed", "<i8"),
+    ("enemy_speed", "<f8"),
+    ("scared_speed", "<f8"),
+    ("power_up_duration", "<f8"),
+    ("score", "<i8"),
+    ("survival_time", "<f8"),
+    ("gems_collected", "<i4"),
+    ("power_ups_collected", "<i4"),
+    ("enemies_eaten", "<i4"),
+    ("caught", "u1"),
+)
+
+SCHEMA_FILE = "schema.json"
+
+class ColumnWriter:
+    """Appends result rows to one raw little-endian file per column
+
+    Rows are buffered and written in blocks. schema.json (column types,
+    row count and any metadata) is rewritten after every block, so the
+    files can be read with load_results while a run is still going.
+    """
+    def __init__(self, directory, columns, flush_rows=1024, metadata=None):
+        self.directory = directory
+        self.columns = columns
+        self.flush_rows = flush_rows
+        self.metadata = metadata or {}
+        self.rows = 0
+        self._buffer = {name: [] for name, _ in columns}
+
+        os.makedirs(directory, exist_ok=True)
+        self._files = {name: open(os.path.join(directory, f"{name}.bin"), "wb") for name, _ in columns}
+        self._write_schema()
+
+    def append(self, row):
+        """Add one row (a dict with a value for every column)"""
+        for name, _ in self.columns:
+            self._buffer[name].append(row[name])
+        if len(self._buffer[self.columns[0][0]]) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows"""
+        count = len(self._buffer[self.columns[0][0]])
+        if not count:
+            return
+        for name, dtype in self.columns:
+            values = self._buffer[name]
+            np.asarray(values, dtype=dtype).tofile(self._files[name])
+            self._files[name].flush()
+            values.clear()
+        self.rows += count
+        self._write_schema()
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_schema(self):
+        schema = {"rows": self.rows, "columns": dict(self.columns), "metadata": self.metadata}
+        temp_filename = os.path.join(self.directory, SCHEMA_FILE + ".tmp")
+        with open(temp_filename, "w") as f:
+            json.dump(schema, f, indent=2)
+        os.replace(temp_filename, os.path.join(self.directory, SCHEMA_FILE))
+
+def load_results(directory):
+    """{column: array} for a ColumnWriter directory (memory-mapped, read-only)"""
+    with open(os.path.join(directory, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+    rows = schema["rows"]
+    results = {}
+    for name, dtype in schema["columns"].items():
+        if rows:
+            results[name] = np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+        else:
+            results[name] = np.empty(0, dtype=dtype)
+    return results
+
+# Per-process simulation and bots, built by the first game a worker plays
+_worker_state = None
+
+def _get_worker_state():
+    global _worker_state
+    if _worker_state is None:
+        game_map = GameMap(1024, 768, cache=MapCache())
+        simulation = Simulation(game_map=game_map)
+        bots = {name: make_bot(name, game_map) for name in BOTS}
+        _worker_state = (simulation, bots)
+    return _worker_state
+
+def play_game(task):
+    """Play one game to the end and return its result row"""
+    game_id, seed, enemy_speed, scared_speed, power_up_duration, bot_name = task
+    simulation, bots = _get_worker_state()
+
+    simulation.enemy_speed = enemy_speed
+    simulation.enemy_scared_speed = scared_speed
+    simulation.power_up_duration = power_up_duration
+    simulation.reset(seed)
+    bot = bots[bot_name]
+    bot.reset(seed)
+
+    counts = {EVENT_GEM: 0, EVENT_POWER_UP: 0, EVENT_ENEMY_EATEN: 0, EVENT_PLAYER_CAUGHT: 0}
+    while not simulation.game_over:
+        for event in simulation.step(bot(simulation)):
+            counts[event] += 1
+
+    return {
+        "game_id": game_id,
+        "seed": seed,
+        "enemy_speed": enemy_speed,
+        "scared_speed": scared_speed,
+        "power_up_duration": power_up_duration,
+        "score": simulation.score,
+        "survival_time": simulation.elapsed_time,
+        "gems_collected": counts[EVENT_GEM],
+        "power_ups_collected": counts[EVENT_POWER_UP],
+        "enemies_eaten": counts[EVENT_ENEMY_EATEN],
+        "caught": counts[EVENT_PLAYER_CAUGHT] > 0,
+    }
+
+def make_tasks(games, enemy_speeds, scared_speeds, power_up_durations, bot, first_seed=0):
+    """One task per game for every combination of settings; seeds repeat across settings"""
+    tasks = []
+    settings = itertools.product(enemy_speeds, scared_speeds, power_up_durations)
+    for enemy_speed, scared_speed, power_up_duration in settings:
+        for game in range(games):
+            tasks.append((len(tasks), first_seed + game, enemy_speed, scared_speed, power_up_duration, bot))
+    return tasks
+
+def summarize(results):
+    """Print mean score, survival time and catch rate per setting"""
+    settings = np.stack([results["enemy_speed"], results["scared_speed"], results["power_up_duration"]], axis=1)
+    print(f"\n{'enemy':>7} {'scared':>7} {'power':>6} {'games':>7} {'score':>8} {'survived':>9} {'eaten':>6} {'caught':>7}")
+    for setting in np.unique(settings, axis=0):
+        mask = (settings == setting).all(axis=1)
+        print(f"{setting[0]:>7.2f} {setting[1]:>7.2f} {setting[2]:>6.1f} {mask.sum():>7} "
+              f"{results['score'][mask].mean():>8.1f} {results['survival_time'][mask].mean():>8.1f}s "
+              f"{results['enemies_eaten'][mask].mean():>6.2f} {results['caught'][mask].mean():>6.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless games in parallel for balance tuning")
+    parser.add_argument("--games", type=int, default=100, help="games per combination of settings")
+    parser.add_argument("--enemy-speed", type=float, nargs="+", default=[3.2])
+    parser.add_argument("--scared-speed", type=float, nargs="+", default=[2.5])
+    parser.add_argument("--power-up-duration", type=float, nargs="+", default=[10.0])
+    parser.add_argument("--bot", choices=BOTS, default="greedy", help="who plays the games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: all cores)")
+    parser.add_argument("--output", default="batch_results", help="directory for the result columns")
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.games, args.enemy_speed, args.scared_speed, args.power_up_duration,
+                       args.bot, args.seed)
+    metadata = {"bot": args.bot, "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    # Small chunks keep the workers evenly loaded, since game lengths vary a lot
+    chunksize = max(1, min(16, len(tasks) // (args.workers * 8)))
+    start = time.perf_counter()
+    with ColumnWriter(args.output, RESULT_COLUMNS, metadata=metadata) as writer, Pool(args.workers) as pool:
+        for done, row in enumerate(pool.imap_unordered(play_game, tasks, chunksize), 1):
+            writer.append(row)
+            if done % 1000 == 0:
+                print(f"{done}/{len(tasks)} games")
+    elapsed = time.perf_counter() - start
+
+    print(f"Played {len(tasks)} games in {elapsed:.1f}s with {args.workers} workers; results in {args.output}/")
+    summarize(load_results(args.output))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""Benchmarks for the game's hot paths
+
+Runs headless (SDL dummy video/audio drivers) at several scales, writes the
+results as JSON and compares them with a stored baseline:
+
+    python benchmark.py                           # run and compare with benchmark_baseline.json
+    python benchmark.py --quick                   # smaller scales for CI
+    python benchmark.py --output results.json     # also save this run
+    python benchmark.py --save-baseline           # make this run the new baseline
+
+The exit status is 1 if any case got slower than the baseline by more than
+--threshold (default 1.25x), or --short-threshold (default 1.5x) for cases
+under SHORT_CASE_MS, whose timings are noisier. Timings are only comparable
+on the machine that recorded the baseline; on another machine, save a new
+baseline there first.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Run without a window or sound device (must be set before pygame starts SDL)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from game_map import GameMap
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+# Scales for each parameterised case (the --quick run uses the first two)
+ENEMY_COUNTS = (4, 100, 1000)
+COLLECTIBLE_COUNTS = (24, 1000, 10000)
+EXTRA_WALL_COUNTS = (0, 100, 1000)
+VECTOR_ENV_COUNTS = (64, 1024, 4096)
+
+# Cases faster than this (in the baseline) are compared with --short-threshold
+SHORT_CASE_MS = 1.0
+
+def _time_per_call(function, number, repeat=5):
+    """Median time per call in milliseconds over several repeats"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times) * 1000
+
+def _map_with_extra_walls(extra_walls, seed=0):
+    """Build the default map plus a number of small random walls"""
+    rng = random.Random(seed)
+    game_map = GameMap(1024, 768)
+    for _ in range(extra_walls):
+        x = rng.randint(0, game_map.width - 40)
+        y = rng.randint(0, game_map.height - 40)
+        game_map.walls.append(pygame.Rect(x, y, rng.randint(5, 40), rng.randint(5, 40)))
+    game_map._build_clearance_map()
+    return game_map
+
+def _random_valid_positions(game_map, count, radius, rng):
+    """count random positions where an entity of the given radius fits"""
+    positions = []
+    while len(positions) < count:
+        x = rng.uniform(radius, game_map.width - radius)
+        y = rng.uniform(radius, game_map.height - radius)
+        if game_map.is_valid_position(x, y, radius):
+            positions.append((x, y))
+    return positions
+
+def _game_with(enemy_count, collectible_count, seed=0):
+    """A Game with the requested number of enemies and collectibles"""
+    from game import Game
+    from enemy import Enemy
+    from collectible import Gem
+
+    game = Game(seed=seed)
+    simulation = game.simulation
+    simulation.game_duration = 10 ** 9  # Never time out
+
+    rng = random.Random(seed)
+    for x, y in _random_valid_positions(simulation.game_map, max(0, enemy_count - len(simulation.enemies)), 12, rng):
+        simulation.enemies.add(Enemy(x, y))
+    extra_gems = max(0, collectible_count - len(simulation.gems) - len(simulation.power_ups))
+    for x, y in _random_valid_positions(simulation.game_map, extra_gems, 8, rng):
+        simulation.gems.add(Gem(x, y))
+    return game
+
+def bench_game_update(enemy_count, collectible_count):
+    game = _game_with(enemy_count, collectible_count)
+
+    def update():
+        game.update()
+        # Keep the game running even if the player is caught
+        game.simulation.game_over = False
+
+    return _time_per_call(update, number=20)
+
+def bench_game_draw(enemy_count, collectible_count):
+    game = _game_with(enemy_count, collectible_count)
+    game.draw()  # Build cached surfaces outside the timing
+    return _time_per_call(game.draw, number=10)
+
+def bench_is_valid_position(extra_walls, scan=False):
+    """Per-call cost of the clearance lookup, or of the per-wall rect scan it replaced"""
+    game_map = _map_with_extra_walls(extra_walls)
+    rng = random.Random(1)
+    queries = [(rng.uniform(20, 1000), rng.uniform(20, 740), 12) for _ in range(1000)]
+    check = game_map._scan_walls if scan else game_map.is_valid_position
+
+    def run_queries():
+        for x, y, radius in queries:
+            check(x, y, radius)
+
+    # Report per call
+    return _time_per_call(run_queries, number=5) / len(queries)
+
+def bench_get_valid_positions(extra_walls):
+    game_map = _map_with_extra_walls(extra_walls)
+
+    def cold_get_valid_positions():
+        game_map._spawn_points = None
+        game_map.get_valid_positions()
+
+    return _time_per_call(cold_get_valid_positions, number=20)
+
+def bench_enemy_update(enemy_count):
+    from enemy import Enemy
+
+    random.seed(0)
+    game_map = GameMap(1024, 768)
+    rng = random.Random(0)
+    enemies = [Enemy(x, y) for x, y in _random_valid_positions(game_map, enemy_count, 12, rng)]
+
+    def update_all():
+        for enemy in enemies:
+            enemy.update(500, 400, game_map, False)
+
+    return _time_per_call(update_all, number=10)
+
+def bench_enemy_swarm_update(enemy_count):
+    from enemy_swarm import EnemySwarm
+
+    game_map = GameMap(1024, 768)
+    swarm = EnemySwarm(capacity=enemy_count, rng=np.random.default_rng(0))
+    for x, y in _random_valid_positions(game_map, enemy_count, 12, random.Random(0)):
+        swarm.add(x, y)
+
+    return _time_per_call(lambda: swarm.update(500, 400, game_map, False), number=10)
+
+def bench_vector_env_step(num_envs):
+    from vector_env import VectorEnv
+
+    env = VectorEnv(num_envs, seed=0)
+    actions = np.random.default_rng(0).choice([1, 2, 4, 8], size=num_envs)
+    return _time_per_call(lambda: env.step(actions), number=20)
+
+def bench_rasterize_batch(num_envs):
+    from vector_env import VectorEnv
+    from rasterizer import GridRasterizer
+
+    env = VectorEnv(num_envs, seed=0)
+    rasterizer = GridRasterizer(env.game_map, 64, 48)
+    out = rasterizer.allocate(num_envs)
+    return _time_per_call(lambda: rasterizer.rasterize_batch(env, out), number=20)
+
+def bench_path_planner(cached):
+    from navigation import NavGrid
+    from path_planner import PathPlanner
+
+    nav_grid = NavGrid(GameMap.from_tile_file("maps/maze.txt"), radius=12)
+    planner = PathPlanner(nav_grid)
+    start = planner.nearest_walkable(0)
+    goal = planner.nearest_walkable(nav_grid.rows * nav_grid.cols - 1)
+
+    def find():
+        if not cached:
+            planner._cache.clear()
+        planner.find_path(start, goal)
+
+    return _time_per_call(find, number=3)
+
+def bench_path_budget():
+    """Time one PathPlanner.run with the expansion budget a 1 ms path_budget_ms gets
+
+    Close to 1 ms when path_planner.EXPANSIONS_PER_MS suits this machine.
+    """
+    from navigation import NavGrid
+    from path_planner import PathPlanner, EXPANSIONS_PER_MS
+
+    nav_grid = NavGrid(GameMap.from_tile_file("maps/maze.txt"), radius=12)
+    planner = PathPlanner(nav_grid, max_expansions=EXPANSIONS_PER_MS)
+    start = planner.nearest_walkable(0)
+    goal = planner.nearest_walkable(nav_grid.rows * nav_grid.cols - 1)
+
+    def run():
+        # A fresh corner-to-corner search never finishes within the budget
+        planner._pending.clear()
+        planner.request(start, goal)
+        planner.run()
+
+    return _time_per_call(run, number=20)
+
+def bench_sound_manager(warm):
+    from sound_manager import SoundManager
+
+    with tempfile.TemporaryDirectory() as sounds_dir:
+        if warm:
+            SoundManager(sounds_dir)
+            return _time_per_call(lambda: SoundManager(sounds_dir), number=3)
+
+        def cold():
+            for filename in os.listdir(sounds_dir):
+                os.remove(os.path.join(sounds_dir, filename))
+            SoundManager(sounds_dir)
+
+        return _time_per_call(cold, number=3)
+
+def bench_map_load(warm):
+    """Load the large example maze with its navigation grid, with an empty or filled map cache"""
+    from map_cache import MapCache
+    from navigation import NavGrid
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        def load():
+            game_map = GameMap.from_tile_file("maps/maze.txt", cache=MapCache(cache_dir))
+            game_map.get_spawn_points()
+            NavGrid(game_map, radius=12)
+
+        if warm:
+            load()
+            return _time_per_call(load, number=3)
+
+        def cold():
+            shutil.rmtree(cache_dir)
+            load()
+
+        return _time_per_call(cold, number=3)
+
+def bench_game_reset():
+    game = _game_with(4, 24)
+    return _time_per_call(game.reset, number=10)
+
+def bench_game_rebuild():
+    """Restarting by building a new Game, for comparison with Game.reset"""
+    from game import Game
+
+    Game(seed=0)  # Warm the map and sound caches outside the timing
+    return _time_per_call(lambda: Game(seed=0), number=3)
+
+def benchmark_cases(quick=False):
+    """(name, params, function) for every benchmark case at every scale"""
+    scale = slice(0, 2) if quick else slice(None)
+    cases = []
+    for enemies in ENEMY_COUNTS[scale]:
+        for collectibles in COLLECTIBLE_COUNTS[scale]:
+            params = {"enemies": enemies, "collectibles": collectibles}
+            cases.append(("Game.update", params, lambda e=enemies, c=collectibles: bench_game_update(e, c)))
+            cases.append(("Game.draw", params, lambda e=enemies, c=collectibles: bench_game_draw(e, c)))
+    for walls in EXTRA_WALL_COUNTS[scale]:
+        params = {"extra_walls": walls}
+        cases.append(("GameMap.is_valid_position", params, lambda w=walls: bench_is_valid_position(w)))
+        cases.append(("GameMap._scan_walls", params, lambda w=walls: bench_is_valid_position(w, scan=True)))
+        cases.append(("GameMap.get_valid_positions", params, lambda w=walls: bench_get_valid_positions(w)))
+    for enemies in ENEMY_COUNTS[scale]:
+        params = {"enemies": enemies}
+        cases.append(("Enemy.update", params, lambda e=enemies: bench_enemy_update(e)))
+        cases.append(("EnemySwarm.update", params, lambda e=enemies: bench_enemy_swarm_update(e)))
+    for envs in VECTOR_ENV_COUNTS[scale]:
+        cases.append(("VectorEnv.step", {"envs": envs}, lambda n=envs: bench_vector_env_step(n)))
+        cases.append(("GridRasterizer.rasterize_batch", {"envs": envs}, lambda n=envs: bench_rasterize_batch(n)))
+    cases.append(("PathPlanner.find_path", {"cache": "cold"}, lambda: bench_path_planner(cached=False)))
+    cases.append(("PathPlanner.find_path", {"cache": "warm"}, lambda: bench_path_planner(cached=True)))
+    cases.append(("PathPlanner.run", {"budget_ms": 1}, bench_path_budget))
+    cases.append(("SoundManager", {"cache": "cold"}, lambda: bench_sound_manager(warm=False)))
+    cases.append(("SoundManager", {"cache": "warm"}, lambda: bench_sound_manager(warm=True)))
+    cases.append(("GameMap load", {"cache": "cold"}, lambda: bench_map_load(warm=False)))
+    cases.append(("GameMap load", {"cache": "warm"}, lambda: bench_map_load(warm=True)))
+    cases.append(("Game.reset", {}, bench_game_reset))
+    cases.append(("Game() rebuild", {}, bench_game_rebuild))
+    return cases
+
+def case_key(name, params):
+    """Stable identifier for a case, used to match runs against the baseline"""
+    if not params:
+        return name
+    return name + "[" + ",".join(f"{key}={value}" for key, value in sorted(params.items())) + "]"
+
+def run_benchmarks(quick=False):
+    """Run every case and return the results as a JSON-serialisable dict"""
+    pygame.init()
+    results = {}
+    for name, params, function in benchmark_cases(quick):
+        ms_per_call = function()
+        key = case_key(name, params)
+        results[key] = {"name": name, "params": params, "ms_per_call": ms_per_call}
+        print(f"{key:<60} {ms_per_call:>10.4f} ms")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare_to_baseline(report, baseline, threshold, short_threshold=None):
+    """Print a comparison and return the keys that regressed beyond threshold
+
+    Cases under SHORT_CASE_MS in the baseline use short_threshold instead
+    (the same as threshold when None).
+    """
+    if short_threshold is None:
+        short_threshold = threshold
+    regressions = []
+    print(f"\n{'case':<60} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key, result in report["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:<60} {'-':>10} {result['ms_per_call']:>10.4f}    new")
+            continue
+        ratio = result["ms_per_call"] / base["ms_per_call"] if base["ms_per_call"] else float("inf")
+        limit = short_threshold if base["ms_per_call"] < SHORT_CASE_MS else threshold
+        flag = "  REGRESSION" if ratio > limit else ""
+        print(f"{key:<60} {base['ms_per_call']:>10.4f} {result['ms_per_call']:>10.4f} {ratio:>6.2f}x{flag}")
+        if ratio > limit:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's update and draw hot paths")
+    parser.add_argument("--quick", action="store_true", help="only run the smaller scales")
+    parser.add_argument("--output", help="write this run's results to a JSON file")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression (default 1.25)")
+    parser.add_argument("--short-threshold", type=float, default=1.5,
+                        help=f"the same for cases under {SHORT_CASE_MS} ms in the baseline (default 1.5)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(quick=args.quick)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(report, baseline, args.threshold, args.short_threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than {args.threshold}x the baseline "
+              f"({args.short_threshold}x for cases under {SHORT_CASE_MS} ms)")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import random
+from player import INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN
+from navigation import NavGrid, FlowField
+
+# (input bit, dx, dy) for each direction the player can move
+DIRECTIONS = ((INPUT_LEFT, -1, 0), (INPUT_RIGHT, 1, 0), (INPUT_UP, 0, -1), (INPUT_DOWN, 0, 1))
+
+class RandomBot:
+    """Walks in a random direction, picking a new one every so often or when blocked"""
+    def __init__(self, min_ticks=20, max_ticks=60):
+        self.min_ticks = min_ticks
+        self.max_ticks = max_ticks
+        self.reset()
+
+    def reset(self, seed=None):
+        """Start a new game (the same seed gives the same walk)"""
+        self.rng = random.Random(seed)
+        self.input_mask = 0
+        self.ticks_left = 0
+
+    def __call__(self, simulation):
+        """Input mask for the next tick"""
+        player = simulation.player
+        blocked = player.x == player.prev_x and player.y == player.prev_y
+        if self.ticks_left <= 0 or blocked:
+            self.input_mask = self.rng.choice(DIRECTIONS)[0]
+            self.ticks_left = self.rng.randint(self.min_ticks, self.max_ticks)
+        self.ticks_left -= 1
+        return self.input_mask
+
+class GreedyBot:
+    """Heads for the nearest collectible along the maze and runs from close enemies
+
+    With a power-up active it goes after nearby enemies instead of running.
+    Paths come from a flow field over a NavGrid built for the player's size.
+    """
+    DANGER_RADIUS = 90
+
+    def __init__(self, game_map, player_radius=15):
+        self.game_map = game_map
+        self.flow_field = FlowField(NavGrid(game_map, radius=player_radius))
+        self.reset()
+
+    def reset(self, seed=None):
+        """Start a new game (the bot itself has no randomness)"""
+        self.input_mask = 0
+
+    def __call__(self, simulation):
+        """Input mask for the next tick"""
+        player = simulation.player
+        threats = simulation.enemies.colliding(player.x, player.y, self.DANGER_RADIUS)
+
+        if threats and not simulation.power_up_active:
+            self.input_mask = self._away_from(simulation, threats)
+            return self.input_mask
+
+        candidates = list(simulation.gems) + list(simulation.power_ups)
+        if simulation.power_up_active:
+            candidates += threats
+        if not candidates:
+            self.input_mask = 0
+            return self.input_mask
+
+        target = min(candidates, key=lambda entity: (entity.x - player.x) ** 2 + (entity.y - player.y) ** 2)
+        self.flow_field.update(target.x, target.y)
+        step = self.flow_field.chase_target(player.x, player.y)
+        if step is None:
+            step = (target.x, target.y)
+        self.input_mask = self._toward(player, step[0], step[1])
+        return self.input_mask
+
+    def _toward(self, player, x, y):
+        """Move along the axis with the larger gap, or the other one if that is blocked"""
+        dx = x - player.x
+        dy = y - player.y
+        horizontal = INPUT_RIGHT if dx > 0 else INPUT_LEFT
+        vertical = INPUT_DOWN if dy > 0 else INPUT_UP
+        if abs(dx) >= abs(dy):
+            primary, secondary = horizontal, vertical
+        else:
+            primary, secondary = vertical, horizontal
+
+        # Off-centre in a corridor the main direction can hit a wall corner;
+        # slide along the other axis until it is clear
+        blocked = player.x == player.prev_x and player.y == player.prev_y
+        if blocked and self.input_mask == primary:
+            return secondary
+        return primary
+
+    def _away_from(self, simulation, threats):
+        """Direction whose next position is furthest from the closest threat"""
+        player = simulation.player
+        best_mask, best_distance = 0, -1.0
+        for input_mask, dx, dy in DIRECTIONS:
+            x = player.x + dx * player.speed
+            y = player.y + dy * player.speed
+            if not self.game_map.is_valid_position(x, y, player.radius):
+                continue
+            distance = min((enemy.x - x) ** 2 + (enemy.y - y) ** 2 for enemy in threats)
+            if distance > best_distance:
+                best_mask, best_distance = input_mask, distance
+        return best_mask
+
+# Bots by name, for command-line tools
+BOTS = ("greedy", "random")
+
+def make_bot(name, game_map):
+    """Create a bot by name"""
+    if name == "greedy":
+        return GreedyBot(game_map)
+    if name == "random":
+        return RandomBot()
+    raise ValueError(f"unknown bot {name!r}")
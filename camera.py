@@ -0,0 +1,32 @@
+import pygame
+
+class Camera:
+    """Screen-sized window onto a map, kept centred on a target
+
+    rect is the visible part of the world in world (map) coordinates; draw
+    things at (x - rect.x, y - rect.y). The view stops at the map edges, and
+    a map smaller than the screen is centred on it.
+    """
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.rect = pygame.Rect(0, 0, view_width, view_height)
+        self.world_rect = pygame.Rect(0, 0, world_width, world_height)
+        self.rect.clamp_ip(self.world_rect)
+
+    @property
+    def offset(self):
+        """World position of the screen's top-left corner"""
+        return self.rect.topleft
+
+    @property
+    def scrolls(self):
+        """Whether the map is larger than the view"""
+        return self.world_rect.width > self.rect.width or self.world_rect.height > self.rect.height
+
+    def follow(self, x, y):
+        """Centre the view on (x, y) as far as the map edges allow"""
+        self.rect.center = (int(x), int(y))
+        self.rect.clamp_ip(self.world_rect)
+
+    def view_rect(self, margin=0):
+        """The visible world rect grown by margin pixels on every side"""
+        return self.rect.inflate(margin * 2, margin * 2)
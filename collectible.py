@@ -1,78 +1,128 @@
 import pygame
 import math
+from sprite_atlas import get_atlas
 
 class Collectible:
-    """Base class for collectible items"""
-    def __init__(self, x, y, radius, color):
+    """Base class for collectible items
+    
+    Subclasses set radius and color on the class; instances only hold their
+    position. The animation frame is worked out from the game clock when the
+    item is drawn, so it runs at the same speed whatever the frame rate.
+    """
+    __slots__ = ("x", "y")
+    
+    radius = 10
+    color = (255, 255, 255)
+    
+    # Animation time between pre-rendered frames, the length of one full
+    # cycle, and how many frames are shown per second of game time
+    ANIMATION_STEP = 0.1
+    ANIMATION_PERIOD = 2 * math.pi
+    ANIMATION_FPS = 60
+    
+    def __init__(self, x, y):
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        """Place the item at (x, y)"""
         self.x = x
         self.y = y
-        self.radius = radius
-        self.color = color
-        self.animation_time = 0
     
-    def draw(self, screen):
+    @classmethod
+    def animation_frame_count(cls):
+        """Number of pre-rendered frames in one animation cycle"""
+        return max(1, round(cls.ANIMATION_PERIOD / cls.ANIMATION_STEP))
+    
+    @staticmethod
+    def animation_extent(radius):
+        """Largest distance from the centre any frame draws to"""
+        return int(math.ceil(radius * 1.5)) + 1
+    
+    @staticmethod
+    def render_frame(surface, center, animation_time, radius, color):
         """Draw the collectible with animation"""
-        self.animation_time += 0.1
-        
         # Pulsing effect
-        pulse = math.sin(self.animation_time) * 0.2 + 1
-        current_radius = int(self.radius * pulse)
+        pulse = math.sin(animation_time) * 0.2 + 1
+        current_radius = int(radius * pulse)
         
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), current_radius)
+        pygame.draw.circle(surface, color, center, current_radius)
+    
+    def blit_item(self, offset=(0, 0), seconds=0.0):
+        """(surface, position) for Surface.blits, showing the frame for a game time
+        
+        offset is the camera's world position and seconds the game time being
+        drawn. Items are offset in their cycle by position so they don't all
+        pulse together.
+        """
+        atlas = get_atlas(type(self), self.radius, self.color)
+        frame_index = (int(seconds * self.ANIMATION_FPS) + int(self.x) + int(self.y)) % len(atlas)
+        return atlas.blit_item(frame_index, self.x - offset[0], self.y - offset[1])
+    
+    def draw(self, screen, seconds=0.0):
+        """Draw the animation frame for a game time"""
+        screen.blit(*self.blit_item(seconds=seconds))
 
 class Gem(Collectible):
     """Gem collectible worth 100 points"""
-    def __init__(self, x, y):
-        super().__init__(x, y, radius=8, color=(0, 255, 0))  # Green gems
+    __slots__ = ()
     
-    def draw(self, screen):
+    radius = 8
+    color = (0, 255, 0)  # Green gems
+    ANIMATION_STEP = 0.15
+    
+    @staticmethod
+    def render_frame(surface, center, animation_time, radius, color):
         """Draw gem with sparkle effect"""
-        self.animation_time += 0.15
-        
         # Main gem
-        pulse = math.sin(self.animation_time) * 0.3 + 1
-        current_radius = int(self.radius * pulse)
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), current_radius)
+        pulse = math.sin(animation_time) * 0.3 + 1
+        current_radius = int(radius * pulse)
+        pygame.draw.circle(surface, color, center, current_radius)
         
         # Inner sparkle
         sparkle_color = (150, 255, 150)
         sparkle_radius = max(1, int(current_radius * 0.5))
-        pygame.draw.circle(screen, sparkle_color, (int(self.x), int(self.y)), sparkle_radius)
+        pygame.draw.circle(surface, sparkle_color, center, sparkle_radius)
 
 class PowerUp(Collectible):
     """Power-up collectible that gives temporary invincibility"""
-    def __init__(self, x, y):
-        super().__init__(x, y, radius=12, color=(255, 0, 255))  # Magenta power-ups
+    __slots__ = ()
+    
+    radius = 12
+    color = (255, 0, 255)  # Magenta power-ups
+    ANIMATION_STEP = 0.2
+    # The 8-point star repeats every 1/8 turn and the centre pulse every pi
+    ANIMATION_PERIOD = math.pi
     
-    def draw(self, screen):
+    @staticmethod
+    def render_frame(surface, center, animation_time, radius, color):
         """Draw power-up with special effects"""
-        self.animation_time += 0.2
+        center_x, center_y = center
         
         # Rotating star effect
         star_points = 8
-        outer_radius = self.radius
-        inner_radius = self.radius * 0.5
+        outer_radius = radius
+        inner_radius = radius * 0.5
         
         points = []
         for i in range(star_points * 2):
-            angle = (i * math.pi / star_points) + self.animation_time
+            angle = (i * math.pi / star_points) + animation_time
             if i % 2 == 0:
                 # Outer point
-                radius = outer_radius
+                point_radius = outer_radius
             else:
                 # Inner point
-                radius = inner_radius
+                point_radius = inner_radius
             
-            x = self.x + math.cos(angle) * radius
-            y = self.y + math.sin(angle) * radius
+            x = center_x + math.cos(angle) * point_radius
+            y = center_y + math.sin(angle) * point_radius
             points.append((int(x), int(y)))
         
         # Draw star
         if len(points) >= 6:
-            pygame.draw.polygon(screen, self.color, points)
+            pygame.draw.polygon(surface, color, points)
         
         # Draw pulsing center
-        pulse = math.sin(self.animation_time * 2) * 0.5 + 1
-        center_radius = int(self.radius * 0.3 * pulse)
+        pulse = math.sin(animation_time * 2) * 0.5 + 1
+        center_radius = int(radius * 0.3 * pulse)
         center_color = (255, 255, 255)  # White center
-        pygame.draw.circle(screen, center_color, (int(self.x), int(self.y)), center_radius)
+        pygame.draw.circle(surface, center_color, center, center_radius)
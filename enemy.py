@@ -3,33 +3,63 @@ import math
 import random
 
 class Enemy:
-    def __init__(self, x, y):
+    # Per-instance state only; constants live on the class
+    __slots__ = ("rng", "x", "y", "prev_x", "prev_y", "speed", "scared_speed", "color_index",
+                 "target_x", "target_y", "direction_change_timer", "direction_change_interval")
+    
+    radius = 12
+    # Default speeds and AI interval (instances may be overridden or rescaled, see Simulation.reset)
+    SPEED = 3.2  # Slightly faster than player's normal speed
+    SCARED_SPEED = 2.5  # Slower when player has power-up
+    DIRECTION_CHANGE_INTERVAL = 60  # Change direction every 60 frames when scared
+    
+    # Colors
+    normal_colors = ((255, 0, 0), (255, 165, 0), (255, 192, 203), (0, 255, 255))  # Red, Orange, Pink, Cyan
+    scared_color = (0, 0, 255)  # Blue when scared
+    
+    def __init__(self, x, y, rng=random):
+        """rng is the random stream for colours and AI choices (the random module by default)"""
+        self.reset(x, y, rng)
+    
+    def reset(self, x, y, rng=None):
+        """Restart the enemy at (x, y) with default settings and a new colour
+        
+        Draws from the random stream exactly like a new Enemy, so reusing an
+        enemy (see entity_pool.py) doesn't change how a seeded game plays.
+        """
+        if rng is not None:
+            self.rng = rng
         self.x = x
         self.y = y
-        self.radius = 12
-        self.speed = 3.2  # Slightly faster than player's normal speed
-        self.scared_speed = 2.5  # Slower when player has power-up
-        
-        # Colors
-        self.normal_colors = [(255, 0, 0), (255, 165, 0), (255, 192, 203), (0, 255, 255)]  # Red, Orange, Pink, Cyan
-        self.scared_color = (0, 0, 255)  # Blue when scared
-        self.color_index = random.randint(0, len(self.normal_colors) - 1)
+        # Position before the last update, for interpolated drawing
+        self.prev_x = x
+        self.prev_y = y
+        self.speed = self.SPEED
+        self.scared_speed = self.SCARED_SPEED
+        self.color_index = self.rng.randint(0, len(self.normal_colors) - 1)
         
         # AI behavior
         self.target_x = x
         self.target_y = y
         self.direction_change_timer = 0
-        self.direction_change_interval = 60  # Change direction every 60 frames when scared
+        self.direction_change_interval = self.DIRECTION_CHANGE_INTERVAL
     
-    def update(self, player_x, player_y, game_map, player_has_power_up):
-        """Update enemy position and AI behavior"""
+    def update(self, player_x, player_y, game_map, player_has_power_up, flow_field=None):
+        """Update enemy position and AI behavior
+        
+        flow_field is an optional navigation.FlowField shared by all enemies;
+        without it enemies head straight for (or away from) the player.
+        """
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
         if player_has_power_up:
             # Run away from player
-            self._flee_from_player(player_x, player_y, game_map)
+            self._flee_from_player(player_x, player_y, game_map, flow_field)
             current_speed = self.scared_speed
         else:
             # Chase player
-            self._chase_player(player_x, player_y, game_map)
+            self._chase_player(player_x, player_y, game_map, flow_field)
             current_speed = self.speed
         
         # Calculate direction to target
@@ -54,13 +84,25 @@ class Enemy:
                 # If can't move toward target, try alternative directions
                 self._try_alternative_movement(game_map, current_speed)
     
-    def _chase_player(self, player_x, player_y, game_map):
+    def _chase_player(self, player_x, player_y, game_map, flow_field=None):
         """Set target to chase the player"""
+        if flow_field is not None:
+            step = flow_field.chase_target(self.x, self.y)
+            if step is not None:
+                self.target_x, self.target_y = step
+                return
+        
         self.target_x = player_x
         self.target_y = player_y
     
-    def _flee_from_player(self, player_x, player_y, game_map):
+    def _flee_from_player(self, player_x, player_y, game_map, flow_field=None):
         """Set target to flee from the player"""
+        if flow_field is not None:
+            step = flow_field.flee_target(self.x, self.y)
+            if step is not None:
+                self.target_x, self.target_y = step
+                return
+        
         self.direction_change_timer += 1
         
         if self.direction_change_timer >= self.direction_change_interval:
@@ -94,7 +136,7 @@ class Enemy:
             (0, -speed)   # Up
         ]
         
-        random.shuffle(directions)
+        self.rng.shuffle(directions)
         
         for dx, dy in directions:
             new_x = self.x + dx
@@ -105,15 +147,26 @@ class Enemy:
                 self.y = new_y
                 break
     
-    def draw(self, screen, player_has_power_up):
-        """Draw the enemy"""
+    def render_position(self, alpha):
+        """Position interpolated between the last two updates (alpha 0..1)"""
+        if alpha >= 1.0:
+            return (self.x, self.y)
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+    
+    def draw(self, screen, player_has_power_up, alpha=1.0, offset=(0, 0)):
+        """Draw the enemy (offset is the camera's world position)"""
+        x, y = self.render_position(alpha)
+        x -= offset[0]
+        y -= offset[1]
+        
         if player_has_power_up:
             color = self.scared_color
         else:
             color = self.normal_colors[self.color_index]
         
         # Draw main body
-        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.radius)
+        pygame.draw.circle(screen, color, (int(x), int(y)), self.radius)
         
         # Draw simple eyes
         eye_offset = 4
@@ -122,13 +175,13 @@ class Enemy:
         pupil_color = (0, 0, 0)
         
         # Left eye
-        left_eye_x = int(self.x - eye_offset)
-        left_eye_y = int(self.y - eye_offset)
+        left_eye_x = int(x - eye_offset)
+        left_eye_y = int(y - eye_offset)
         pygame.draw.circle(screen, eye_color, (left_eye_x, left_eye_y), eye_radius)
         pygame.draw.circle(screen, pupil_color, (left_eye_x, left_eye_y), 1)
         
         # Right eye
-        right_eye_x = int(self.x + eye_offset)
-        right_eye_y = int(self.y - eye_offset)
+        right_eye_x = int(x + eye_offset)
+        right_eye_y = int(y - eye_offset)
         pygame.draw.circle(screen, eye_color, (right_eye_x, right_eye_y), eye_radius)
         pygame.draw.circle(screen, pupil_color, (right_eye_x, right_eye_y), 1)
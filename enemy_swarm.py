@@ -0,0 +1,221 @@
+import numpy as np
+from enemy import Enemy
+
+# Alternative directions tried when an enemy is blocked: right, left, down, up
+_ALTERNATIVE_DIRECTIONS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.float64)
+
+class EnemySwarm:
+    """Struct-of-arrays enemy store updated in one vectorized step
+
+    Holds the same state as a list of Enemy objects (position, target, speeds,
+    flee timer) in NumPy arrays and reproduces Enemy.update, _chase_player and
+    _flee_from_player for every enemy at once (positions agree to within
+    floating-point rounding). The only behavioural difference is that the
+    order of alternative directions for blocked enemies is drawn from the
+    swarm's NumPy generator instead of the random module.
+    """
+    def __init__(self, capacity=64, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.count = 0
+
+        # Per-enemy defaults come from Enemy so the two stay in sync
+        template = Enemy(0, 0)
+        self.radius = template.radius
+        self.flee_distance = 200
+        self.default_speed = template.speed
+        self.default_scared_speed = template.scared_speed
+        self.default_direction_change_interval = template.direction_change_interval
+        self.color_count = len(template.normal_colors)
+
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """(Re)allocate the backing arrays, keeping existing enemies"""
+        old_count = self.count
+        fields = {
+            "x": np.float64, "y": np.float64,
+            "target_x": np.float64, "target_y": np.float64,
+            "speed": np.float64, "scared_speed": np.float64,
+            "direction_change_timer": np.int64, "direction_change_interval": np.int64,
+            "color_index": np.int64,
+        }
+        for name, dtype in fields.items():
+            new_array = np.zeros(capacity, dtype=dtype)
+            if old_count:
+                new_array[:old_count] = getattr(self, "_" + name)[:old_count]
+            setattr(self, "_" + name, new_array)
+        self.capacity = capacity
+
+    @classmethod
+    def from_enemies(cls, enemies, rng=None):
+        """Build a swarm holding a copy of each Enemy's state"""
+        swarm = cls(capacity=max(1, len(enemies)), rng=rng)
+        for enemy in enemies:
+            index = swarm.add(enemy.x, enemy.y)
+            swarm._target_x[index] = enemy.target_x
+            swarm._target_y[index] = enemy.target_y
+            swarm._speed[index] = enemy.speed
+            swarm._scared_speed[index] = enemy.scared_speed
+            swarm._direction_change_timer[index] = enemy.direction_change_timer
+            swarm._direction_change_interval[index] = enemy.direction_change_interval
+            swarm._color_index[index] = enemy.color_index
+        return swarm
+
+    def add(self, x, y):
+        """Add an enemy at (x, y) with Enemy's default settings and return its index"""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        index = self.count
+        self._x[index] = x
+        self._y[index] = y
+        self._target_x[index] = x
+        self._target_y[index] = y
+        self._speed[index] = self.default_speed
+        self._scared_speed[index] = self.default_scared_speed
+        self._direction_change_timer[index] = 0
+        self._direction_change_interval[index] = self.default_direction_change_interval
+        self._color_index[index] = self.rng.integers(self.color_count)
+        self.count += 1
+        return index
+
+    def place(self, indices, x, y):
+        """Restart existing enemies at new positions (vectorized; speeds are kept)"""
+        self._x[indices] = x
+        self._y[indices] = y
+        self._target_x[indices] = x
+        self._target_y[indices] = y
+        self._direction_change_timer[indices] = 0
+
+    def remove(self, index):
+        """Remove an enemy in O(1) by moving the last enemy into its slot"""
+        last = self.count - 1
+        if index != last:
+            for name in ("x", "y", "target_x", "target_y", "speed", "scared_speed",
+                         "direction_change_timer", "direction_change_interval", "color_index"):
+                array = getattr(self, "_" + name)
+                array[index] = array[last]
+        self.count = last
+
+    def __len__(self):
+        return self.count
+
+    # Views of the live part of each array
+    @property
+    def x(self):
+        return self._x[:self.count]
+
+    @property
+    def y(self):
+        return self._y[:self.count]
+
+    @property
+    def target_x(self):
+        return self._target_x[:self.count]
+
+    @property
+    def target_y(self):
+        return self._target_y[:self.count]
+
+    @property
+    def speed(self):
+        return self._speed[:self.count]
+
+    @property
+    def scared_speed(self):
+        return self._scared_speed[:self.count]
+
+    @property
+    def direction_change_timer(self):
+        return self._direction_change_timer[:self.count]
+
+    @property
+    def direction_change_interval(self):
+        return self._direction_change_interval[:self.count]
+
+    @property
+    def color_index(self):
+        return self._color_index[:self.count]
+
+    def update(self, player_x, player_y, game_map, player_has_power_up):
+        """Update every enemy's position and AI behavior (see Enemy.update)
+
+        player_x, player_y and player_has_power_up may be scalars or arrays
+        with one entry per enemy.
+        """
+        n = self.count
+        if n == 0:
+            return
+
+        x, y = self.x, self.y
+        target_x, target_y = self.target_x, self.target_y
+        timer = self.direction_change_timer
+        player_x = np.broadcast_to(np.asarray(player_x, dtype=np.float64), (n,))
+        player_y = np.broadcast_to(np.asarray(player_y, dtype=np.float64), (n,))
+        scared = np.broadcast_to(np.asarray(player_has_power_up, dtype=bool), (n,))
+
+        # Flee: retarget away from the player every direction_change_interval ticks
+        timer += scared
+        retarget = scared & (timer >= self.direction_change_interval)
+        timer[retarget] = 0
+
+        flee_dx = x - player_x
+        flee_dy = y - player_y
+        flee_distance = np.sqrt(flee_dx ** 2 + flee_dy ** 2)
+        retarget &= flee_distance > 0
+        if retarget.any():
+            flee_x = x[retarget] + flee_dx[retarget] / flee_distance[retarget] * self.flee_distance
+            flee_y = y[retarget] + flee_dy[retarget] / flee_distance[retarget] * self.flee_distance
+            # Clamp target to screen bounds
+            target_x[retarget] = np.maximum(self.radius, np.minimum(game_map.width - self.radius, flee_x))
+            target_y[retarget] = np.maximum(self.radius, np.minimum(game_map.height - self.radius, flee_y))
+
+        # Chase: target the player directly
+        chasing = ~scared
+        target_x[chasing] = player_x[chasing]
+        target_y[chasing] = player_y[chasing]
+        current_speed = np.where(scared, self.scared_speed, self.speed)
+
+        # Calculate direction to target
+        dx = target_x - x
+        dy = target_y - y
+        distance = np.sqrt(dx ** 2 + dy ** 2)
+        moving = np.flatnonzero(distance > 0)
+        if moving.size == 0:
+            return
+
+        # Normalize direction and check the new positions
+        new_x = x[moving] + dx[moving] / distance[moving] * current_speed[moving]
+        new_y = y[moving] + dy[moving] / distance[moving] * current_speed[moving]
+        valid = game_map.are_valid_positions(new_x, new_y, self.radius)
+        advanced = moving[valid]
+        x[advanced] = new_x[valid]
+        y[advanced] = new_y[valid]
+
+        blocked = moving[~valid]
+        if blocked.size:
+            self._try_alternative_movement(blocked, game_map, current_speed[blocked])
+
+    def _try_alternative_movement(self, blocked, game_map, speed):
+        """Try the four axis directions in a random order for each blocked enemy"""
+        x, y = self.x, self.y
+        order = np.argsort(self.rng.random((blocked.size, 4)), axis=1)
+
+        pending = np.ones(blocked.size, dtype=bool)
+        for attempt in range(4):
+            rows = np.flatnonzero(pending)
+            if rows.size == 0:
+                break
+            direction = _ALTERNATIVE_DIRECTIONS[order[rows, attempt]]
+            indices = blocked[rows]
+            new_x = x[indices] + direction[:, 0] * speed[rows]
+            new_y = y[indices] + direction[:, 1] * speed[rows]
+            valid = game_map.are_valid_positions(new_x, new_y, self.radius)
+            x[indices[valid]] = new_x[valid]
+            y[indices[valid]] = new_y[valid]
+            pending[rows[valid]] = False
+
+    def colliding_with(self, x, y, radius):
+        """Indices of enemies whose circle overlaps a circle at (x, y)"""
+        reach = radius + self.radius
+        return np.flatnonzero((self.x - x) ** 2 + (self.y - y) ** 2 < reach * reach)
@@ -0,0 +1,31 @@
+class EntityPool:
+    """Free lists of finished entities, handed out again instead of allocating new ones
+
+    Works with any entity class whose constructor arguments are also
+    accepted by a reset method (Enemy, Gem, PowerUp). A released entity must
+    no longer be referenced anywhere else, since acquire() will move it.
+    """
+    def __init__(self):
+        self._free = {}  # entity class -> [released entities]
+
+    def acquire(self, entity_type, *args):
+        """A reset entity from the free list, or a new one if it is empty"""
+        free = self._free.get(entity_type)
+        if free:
+            entity = free.pop()
+            entity.reset(*args)
+            return entity
+        return entity_type(*args)
+
+    def release(self, entity):
+        """Return an entity for later reuse"""
+        self._free.setdefault(type(entity), []).append(entity)
+
+    def release_all(self, entities):
+        """Return every entity in an iterable"""
+        for entity in entities:
+            self._free.setdefault(type(entity), []).append(entity)
+
+    def free_count(self, entity_type):
+        """Number of entities of a type waiting to be reused"""
+        return len(self._free.get(entity_type, ()))
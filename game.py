@@ -1,14 +1,21 @@
 import pygame
-import random
-import time
-from player import Player
-from enemy import Enemy
-from collectible import Gem, PowerUp
-from game_map import GameMap
+from player import input_from_keys
+from simulation import Simulation, EVENT_GEM, EVENT_POWER_UP
 from sound_manager import SoundManager
+from text_cache import TextCache
+from profiler import FrameProfiler
+from game_map import GameMap
+from camera import Camera
+from map_cache import MapCache
+from replay import Replay
 
 class Game:
-    def __init__(self):
+    """Window, input and sound shell around the headless Simulation"""
+    # Extra pixels around the view in which entities are still drawn
+    DRAW_MARGIN = 32
+    
+    def __init__(self, dirty_rects=False, tick_rate=60, map_file=None, seed=None, record_file=None,
+                 path_budget_ms=None, ai_mode="inline"):
         # Screen dimensions
         self.SCREEN_WIDTH = 1024
         self.SCREEN_HEIGHT = 768
@@ -20,39 +27,59 @@ class Game:
         self.WHITE = (255, 255, 255)
         self.YELLOW = (255, 255, 0)
         
-        # Game state
-        self.score = 0
-        self.start_time = time.time()
-        self.game_duration = 120  # 2 minutes in seconds
-        self.game_over = False
-        self.power_up_active = False
-        self.power_up_start_time = 0
-        self.power_up_duration = 10  # 10 seconds
-        
-        # Initialize game map
-        self.game_map = GameMap(self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+        # Dirty-rect rendering redraws and pushes only the regions that changed
+        self.dirty_rects = dirty_rects
+        self._previous_dirty = None
+        
+        # Game rules, entities and timers (data derived from the map is cached
+        # on disk, so it is only computed the first time a map is played)
+        map_cache = MapCache()
+        if map_file is None:
+            game_map = GameMap(self.SCREEN_WIDTH, self.SCREEN_HEIGHT, cache=map_cache)
+            self.simulation = Simulation(tick_rate=tick_rate, game_map=game_map, seed=seed,
+                                         path_budget_ms=path_budget_ms, ai_mode=ai_mode)
+        else:
+            game_map = GameMap.from_tile_file(map_file, cache=map_cache)
+            self.simulation = self._simulation_for_map(game_map, tick_rate, seed, path_budget_ms, ai_mode)
+        
+        # A map that isn't exactly screen-sized is drawn through a camera
+        # that follows the player; only the built-in map can use dirty rects
+        self.camera = Camera(self.SCREEN_WIDTH, self.SCREEN_HEIGHT, game_map.width, game_map.height)
+        self.scrolling = (game_map.width, game_map.height) != (self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+        if self.scrolling:
+            self.dirty_rects = False
+        
+        # Every reproducible game's inputs are recorded; with record_file set,
+        # the replay is saved there when the game ends (see replay.py)
+        self.record_file = record_file
+        self.replay = self._start_replay()
+        
+        # Fixed-timestep clock: advance() runs whole ticks and keeps the rest
+        # in the accumulator; alpha is how far drawing is into the next tick
+        self.tick_seconds = 1.0 / tick_rate
+        self.max_frame_time = 0.25  # Don't try to catch up after long stalls
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        
+        # Per-phase frame timing (off until toggled, see toggle_profiler)
+        self.profiler = FrameProfiler()
+        self.simulation.profiler = self.profiler
+        self.show_profiler = False
+        self._profiler_lines = []
+        self._profiler_frame_count = 0
         
         # Initialize sound manager
         self.sound_manager = SoundManager()
         
-        # Initialize player
-        start_pos = self.game_map.get_player_start_position()
-        self.player = Player(start_pos[0], start_pos[1])
-        
-        # Initialize enemies
-        self.enemies = []
-        enemy_positions = self.game_map.get_enemy_start_positions()
-        for pos in enemy_positions:
-            self.enemies.append(Enemy(pos[0], pos[1]))
-        
-        # Initialize collectibles
-        self.gems = []
-        self.power_ups = []
-        self._spawn_collectibles()
-        
         # Font for UI
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
+        self.text_cache = TextCache()
+        
+        # Reusable semi-transparent overlay for the game over screen
+        self.overlay = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+        self.overlay.set_alpha(128)
+        self.overlay.fill(self.BLACK)
         
         # Start background music
         self.sound_manager.start_background_music()
@@ -60,165 +87,246 @@ class Game:
         # Power-up sound management
         self.power_up_sound_playing = False
     
-    def _spawn_collectibles(self):
-        """Spawn gems and power-ups at random valid positions"""
-        valid_positions = self.game_map.get_valid_positions()
-        
-        # Spawn 20 gems
-        for _ in range(20):
-            if valid_positions:
-                pos = random.choice(valid_positions)
-                valid_positions.remove(pos)
-                self.gems.append(Gem(pos[0], pos[1]))
-        
-        # Spawn 4 power-ups
-        for _ in range(4):
-            if valid_positions:
-                pos = random.choice(valid_positions)
-                valid_positions.remove(pos)
-                self.power_ups.append(PowerUp(pos[0], pos[1]))
+    def _simulation_for_map(self, game_map, tick_rate, seed, path_budget_ms=None, ai_mode="inline"):
+        """Simulation for a loaded map, with collectibles scaled to its area"""
+        screens = max(1.0, game_map.width * game_map.height / (self.SCREEN_WIDTH * self.SCREEN_HEIGHT))
+        active_radius = None
+        if game_map.width > self.SCREEN_WIDTH or game_map.height > self.SCREEN_HEIGHT:
+            # Keep enemies moving a little beyond the edges of the screen
+            active_radius = max(self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+        return Simulation(tick_rate=tick_rate, gem_count=round(20 * screens),
+                          power_up_count=round(4 * screens), game_map=game_map,
+                          active_radius=active_radius, seed=seed, path_budget_ms=path_budget_ms,
+                          ai_mode=ai_mode)
     
-    def update(self):
-        """Update game state"""
-        # Check if game time is up
-        elapsed_time = time.time() - self.start_time
-        if elapsed_time >= self.game_duration:
-            self.game_over = True
-            # Stop power-up when game ends
-            self.power_up_active = False
-            self.power_up_sound_playing = False
-            return
-        
-        # Check if all collectibles are collected
-        if not self.gems and not self.power_ups:
-            self.game_over = True
-            # Stop power-up when game ends
-            self.power_up_active = False
-            self.power_up_sound_playing = False
-            return
+    def _start_replay(self):
+        """A Replay recording the current game, or None if it can't be replayed"""
+        if not self.simulation.reproducible:
+            return None
+        return Replay.start(self.simulation)
+    
+    def reset(self):
+        """Start a new game, keeping the display, fonts, sounds and map"""
+        self.simulation.reset()
+        self.replay = self._start_replay()
+        self.power_up_sound_playing = False
+        self._previous_dirty = None
+        self.accumulator = 0.0
+        self.alpha = 1.0
+    
+    @property
+    def score(self):
+        return self.simulation.score
+    
+    @property
+    def game_over(self):
+        return self.simulation.game_over
+    
+    def toggle_profiler(self):
+        """Turn the frame profiler and its overlay on or off"""
+        self.show_profiler = not self.show_profiler
+        self.profiler.enable(self.show_profiler)
+        self._profiler_lines = []
+        self._previous_dirty = None
+    
+    def export_profile(self, filename="frame_trace.json"):
+        """Write the profiler's recent frames as a Chrome trace file"""
+        count = self.profiler.export_chrome_trace(filename)
+        print(f"Wrote {count} trace events to {filename}")
+    
+    def advance(self, frame_time):
+        """Run as many fixed simulation ticks as frame_time seconds cover
+        
+        Returns the number of ticks run. Leftover time carries over to the
+        next frame and sets alpha for interpolated drawing.
+        """
+        self.sound_manager.update_music()
+        self.accumulator += min(frame_time, self.max_frame_time)
+        steps = 0
+        while self.accumulator >= self.tick_seconds and not self.game_over:
+            self.update()
+            self.accumulator -= self.tick_seconds
+            steps += 1
         
-        # Handle power-up timer
-        if self.power_up_active:
-            if time.time() - self.power_up_start_time >= self.power_up_duration:
-                self.power_up_active = False
-                self.power_up_sound_playing = False
+        if self.game_over:
+            self.accumulator = 0.0
+            self.alpha = 1.0
         else:
-            if self.power_up_sound_playing:
-                self.power_up_sound_playing = False
-        
-        # Update player
+            self.alpha = self.accumulator / self.tick_seconds
+        return steps
+    
+    def update(self):
+        """Read input, advance the simulation one tick and play sounds for its events"""
         keys = pygame.key.get_pressed()
-        self.player.update(keys, self.game_map, self.power_up_active)
-        
-        # Update enemies
-        for enemy in self.enemies:
-            enemy.update(self.player.x, self.player.y, self.game_map, self.power_up_active)
-        
-        # Check collisions with gems
-        for gem in self.gems[:]:
-            if self.player.collides_with(gem):
-                self.gems.remove(gem)
-                self.score += 100
+        self.profiler.lap("input")
+        input_mask = input_from_keys(keys)
+        if self.replay is not None:
+            self.replay.record(input_mask)
+        events = self.simulation.step(input_mask)
+        
+        for event in events:
+            if event == EVENT_GEM:
                 self.sound_manager.play_gem_sound()
-        
-        # Check collisions with power-ups
-        for power_up in self.power_ups[:]:
-            if self.player.collides_with(power_up):
-                self.power_ups.remove(power_up)
-                self.power_up_active = True
-                self.power_up_start_time = time.time()
+            elif event == EVENT_POWER_UP:
                 self.sound_manager.play_powerup_sound()
                 self.power_up_sound_playing = True
         
-        # Check collisions with enemies
-        for enemy in self.enemies[:]:
-            if self.player.collides_with(enemy):
-                if self.power_up_active:
-                    # Player destroys enemy
-                    self.enemies.remove(enemy)
-                    self.score += 200
-                else:
-                    # Enemy destroys player
-                    self.game_over = True
-                    # Stop power-up when player dies
-                    self.power_up_active = False
-                    self.power_up_sound_playing = False
+        if not self.simulation.power_up_active:
+            self.power_up_sound_playing = False
+        self.profiler.lap("sound")
+        
+        if self.game_over and self.record_file is not None and self.replay is not None:
+            self.replay.finish(self.simulation)
+            self.replay.save(self.record_file)
+            print(f"Saved replay to {self.record_file}")
     
     def draw(self):
         """Draw everything on screen"""
-        self.screen.fill(self.BLACK)
-        
-        # Draw game map
-        self.game_map.draw(self.screen)
-        
-        # Draw collectibles
-        for gem in self.gems:
-            gem.draw(self.screen)
-        
-        for power_up in self.power_ups:
-            power_up.draw(self.screen)
+        if self.dirty_rects and not self.game_over and self._previous_dirty is not None:
+            self._draw_dirty()
+            return
         
-        # Draw player
-        self.player.draw(self.screen)
+        # Draw game map (clears the screen)
+        if self.scrolling:
+            self.camera.follow(*self.simulation.player.render_position(self.alpha))
+            self.simulation.game_map.draw_view(self.screen, self.camera.rect)
+        else:
+            self.simulation.game_map.draw(self.screen)
+        self.profiler.lap("draw_map")
         
-        # Draw enemies
-        for enemy in self.enemies:
-            enemy.draw(self.screen, self.power_up_active)
+        self._draw_entities()
         
         # Draw UI
-        self._draw_ui()
+        ui_rects = self._draw_ui() + self._draw_profiler_overlay()
         
         # Draw game over screen if needed
         if self.game_over:
             self._draw_game_over()
+            self._previous_dirty = None
+        elif self.dirty_rects:
+            # Only dirty-rect drawing needs to know what to erase next frame
+            self._previous_dirty = self._entity_rects() + ui_rects
+        else:
+            self._previous_dirty = None
+        self.profiler.lap("draw_hud")
         
         pygame.display.flip()
+        self.profiler.lap("flip")
+    
+    def _draw_dirty(self):
+        """Redraw only the regions under moving entities, collectibles and HUD text"""
+        game_map = self.simulation.game_map
+        
+        # Erase last frame's entities and text
+        for rect in self._previous_dirty:
+            game_map.restore(self.screen, rect)
+        self.profiler.lap("draw_map")
+        
+        self._draw_entities()
+        dirty = self._entity_rects() + self._draw_ui() + self._draw_profiler_overlay()
+        self.profiler.lap("draw_hud")
+        
+        pygame.display.update(self._previous_dirty + dirty)
+        self._previous_dirty = dirty
+        self.profiler.lap("flip")
+    
+    def _entity_rects(self):
+        """Screen rects covering every entity, including animation overshoot"""
+        simulation = self.simulation
+        rects = []
+        for entity in (*simulation.gems, *simulation.power_ups):
+            # Collectibles pulse up to 1.3x their radius
+            extent = int(entity.radius * 1.5) + 2
+            rects.append(pygame.Rect(int(entity.x) - extent, int(entity.y) - extent, extent * 2, extent * 2))
+        for entity in (simulation.player, *simulation.enemies):
+            x, y = entity.render_position(self.alpha)
+            extent = int(entity.radius * 1.5) + 2
+            rects.append(pygame.Rect(int(x) - extent, int(y) - extent, extent * 2, extent * 2))
+        return rects
+    
+    def _draw_entities(self):
+        """Draw the collectibles, player and enemies that are in view"""
+        simulation = self.simulation
+        view = self.camera.view_rect(self.DRAW_MARGIN)
+        offset = self.camera.offset
+        seconds = simulation.elapsed_time + self.alpha * self.tick_seconds
+        
+        # Draw collectibles in one batch from their pre-rendered frames
+        collectibles = (*simulation.gems.in_rect(view), *simulation.power_ups.in_rect(view))
+        self.screen.blits([item.blit_item(offset, seconds) for item in collectibles], doreturn=False)
+        
+        # Draw player
+        simulation.player.draw(self.screen, self.alpha, offset)
+        
+        # Draw enemies
+        for enemy in simulation.enemies.in_rect(view):
+            enemy.draw(self.screen, simulation.power_up_active, self.alpha, offset)
+        self.profiler.lap("draw_entities")
     
     def _draw_ui(self):
-        """Draw the user interface"""
+        """Draw the user interface and return the rects it covered"""
+        rects = []
+        
         # Draw score
-        score_text = self.font.render(f"Score: {self.score}", True, self.WHITE)
-        self.screen.blit(score_text, (10, 10))
+        score_text = self.text_cache.render(self.font, f"Score: {self.score}", self.WHITE)
+        rects.append(self.screen.blit(score_text, (10, 10)))
         
         # Draw timer
-        elapsed_time = time.time() - self.start_time
-        remaining_time = max(0, self.game_duration - elapsed_time)
+        remaining_time = self.simulation.remaining_time
         minutes = int(remaining_time // 60)
         seconds = int(remaining_time % 60)
-        timer_text = self.font.render(f"Time: {minutes:02d}:{seconds:02d}", True, self.WHITE)
-        self.screen.blit(timer_text, (10, 50))
+        timer_text = self.text_cache.render(self.font, f"Time: {minutes:02d}:{seconds:02d}", self.WHITE)
+        rects.append(self.screen.blit(timer_text, (10, 50)))
         
         # Draw power-up status
-        if self.power_up_active and not self.game_over:
-            power_remaining = self.power_up_duration - (time.time() - self.power_up_start_time)
-            # Ensure we don't show negative values
-            power_remaining = max(0, power_remaining)
-            power_text = self.font.render(f"POWER UP: {power_remaining:.1f}s", True, self.YELLOW)
-            self.screen.blit(power_text, (10, 90))
+        if self.simulation.power_up_active and not self.game_over:
+            power_remaining = self.simulation.power_up_remaining
+            power_text = self.text_cache.render(self.font, f"POWER UP: {power_remaining:.1f}s", self.YELLOW)
+            rects.append(self.screen.blit(power_text, (10, 90)))
         
         # Draw collectibles remaining
-        collectibles_text = self.small_font.render(f"Gems: {len(self.gems)} | Power-ups: {len(self.power_ups)}", True, self.WHITE)
-        self.screen.blit(collectibles_text, (10, 130))
+        collectibles_text = self.text_cache.render(self.small_font, f"Gems: {len(self.simulation.gems)} | Power-ups: {len(self.simulation.power_ups)}", self.WHITE)
+        rects.append(self.screen.blit(collectibles_text, (10, 130)))
+        
+        return rects
+    
+    def _draw_profiler_overlay(self):
+        """Draw p50/p99 time per frame phase and return the rects it covered"""
+        if not self.show_profiler:
+            return []
+        
+        # Refresh the numbers a few times a second so the text stays readable
+        self._profiler_frame_count += 1
+        if not self._profiler_lines or self._profiler_frame_count % 15 == 0:
+            self._profiler_lines = [("phase", "p50 ms", "p99 ms")]
+            for phase, (p50, p99) in self.profiler.phase_stats().items():
+                self._profiler_lines.append((phase, f"{p50:.2f}", f"{p99:.2f}"))
+        
+        # One column per field so the numbers line up
+        rects = []
+        columns = (self.SCREEN_WIDTH - 260, self.SCREEN_WIDTH - 130, self.SCREEN_WIDTH - 65)
+        for row, fields in enumerate(self._profiler_lines):
+            for x, field in zip(columns, fields):
+                text = self.text_cache.render(self.small_font, field, self.YELLOW)
+                rects.append(self.screen.blit(text, (x, 30 + row * 20)))
+        return rects
     
     def _draw_game_over(self):
         """Draw game over screen"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(self.BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay, (0, 0))
         
         # Game over text
-        game_over_text = self.font.render("GAME OVER", True, self.WHITE)
+        game_over_text = self.text_cache.render(self.font, "GAME OVER", self.WHITE)
         text_rect = game_over_text.get_rect(center=(self.SCREEN_WIDTH // 2, self.SCREEN_HEIGHT // 2 - 40))
         self.screen.blit(game_over_text, text_rect)
         
         # Final score
-        final_score_text = self.font.render(f"Final Score: {self.score}", True, self.WHITE)
+        final_score_text = self.text_cache.render(self.font, f"Final Score: {self.score}", self.WHITE)
         score_rect = final_score_text.get_rect(center=(self.SCREEN_WIDTH // 2, self.SCREEN_HEIGHT // 2))
         self.screen.blit(final_score_text, score_rect)
         
         # Restart instruction
-        restart_text = self.small_font.render("Press R to restart", True, self.WHITE)
+        restart_text = self.text_cache.render(self.small_font, "Press R to restart", self.WHITE)
         restart_rect = restart_text.get_rect(center=(self.SCREEN_WIDTH // 2, self.SCREEN_HEIGHT // 2 + 40))
         self.screen.blit(restart_text, restart_rect)
@@ -1,19 +1,75 @@
 import pygame
 import random
+import hashlib
+import numpy as np
+from tile_map import TileMap
+
+# Largest clearance (in pixels) stored per cell; bigger entities fall back to a wall scan
+CLEARANCE_LIMIT = 255
+
+# Side of the square pieces large maps are drawn in
+CHUNK_SIZE = 256
 
 class GameMap:
     """Handles the game map, walls, and collision detection"""
-    def __init__(self, width, height):
+    def __init__(self, width, height, walls=None, player_start=None, enemy_starts=(), cache=None):
+        """walls replaces the built-in layout; player_start and enemy_starts
+        fix the start positions (by default they are picked automatically).
+        cache is an optional map_cache.MapCache for the derived arrays."""
         self.width = width
         self.height = height
+        self.cache = cache
+        self._content_hash = None
         self.wall_thickness = 20
         self.walls = []
+        self.player_start = player_start
+        self.enemy_starts = list(enemy_starts)
         
         # Colors
         self.wall_color = (0, 0, 255)  # Blue walls
         self.background_color = (0, 0, 0)  # Black background
         
-        self._create_walls()
+        # Pre-rendered walls, built on first draw (walls never change)
+        self._background = None
+        
+        # Walls rendered in CHUNK_SIZE pieces for maps larger than the screen,
+        # each built the first time it comes into view
+        self._chunks = {}
+        self._chunk_walls = None
+        
+        # Valid spawn grid points, computed on first use
+        self._spawn_points = None
+        
+        if walls is None:
+            self._create_walls()
+        else:
+            self.walls.extend(walls)
+        self._build_clearance_map()
+    
+    @classmethod
+    def from_tile_map(cls, tile_map, cache=None):
+        """Build a map from a tile_map.TileMap"""
+        return cls(tile_map.width, tile_map.height, walls=tile_map.wall_rects(),
+                   player_start=tile_map.player_start, enemy_starts=tile_map.enemy_starts,
+                   cache=cache)
+    
+    @classmethod
+    def from_tile_file(cls, path, cache=None):
+        """Load a map from a tile map file (see tile_map.py for the format)"""
+        return cls.from_tile_map(TileMap.load(path), cache)
+    
+    def content_hash(self):
+        """Hash of everything the derived data depends on (size and walls)"""
+        if self._content_hash is None:
+            source = repr((self.width, self.height, CLEARANCE_LIMIT, [tuple(wall) for wall in self.walls]))
+            self._content_hash = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+        return self._content_hash
+    
+    def cached_array(self, name, build):
+        """An array derived from this map, from the cache if there is one, else build()"""
+        if self.cache is None:
+            return build()
+        return self.cache.get(self.content_hash(), name, build)
     
     def _create_walls(self):
         """Create the wall layout for the map with wider passages"""
@@ -90,6 +146,50 @@ class GameMap:
             if x + w < self.width - self.wall_thickness and y + h < self.height - self.wall_thickness:
                 self.walls.append(pygame.Rect(x, y, w, h))
     
+    def _build_clearance_map(self):
+        """Precompute the clearance field used by is_valid_position
+        
+        clearance[y, x] is the side of the largest wall-free square whose
+        top-left pixel is (x, y), capped at CLEARANCE_LIMIT. A square of size s
+        at (x, y) overlaps a wall exactly when clearance[y, x] < s, which is the
+        same answer pygame.Rect.colliderect gives against every wall.
+        Call this again if self.walls is modified after construction.
+        """
+        # The walls may have changed, so everything derived from them is stale
+        self._content_hash = None
+        self._spawn_points = None
+        self._background = None
+        self._chunks = {}
+        self._chunk_walls = None
+        
+        self.clearance = self.cached_array("clearance", self._compute_clearance)
+        
+        # memoryview indexing returns plain ints, which is cheaper than NumPy scalars
+        self._clearance_view = memoryview(self.clearance)
+    
+    def _compute_clearance(self):
+        """Clearance field from the walls (see _build_clearance_map)"""
+        clearance = np.full((self.height, self.width), CLEARANCE_LIMIT, dtype=np.uint8)
+        
+        for wall in self.walls:
+            # Only pixels above/left of the wall (within the limit) can see it
+            x0 = max(0, wall.left - CLEARANCE_LIMIT)
+            y0 = max(0, wall.top - CLEARANCE_LIMIT)
+            x1 = min(self.width, wall.right)
+            y1 = min(self.height, wall.bottom)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            
+            # Chebyshev distance to the wall's top-left corner region
+            dx = np.maximum(wall.left - np.arange(x0, x1), 0)
+            dy = np.maximum(wall.top - np.arange(y0, y1), 0)
+            distance = np.maximum(dy[:, None], dx[None, :])
+            
+            region = clearance[y0:y1, x0:x1]
+            np.minimum(region, distance.astype(np.uint8), out=region)
+        
+        return clearance
+    
     def is_valid_position(self, x, y, radius):
         """Check if a position is valid (not colliding with walls)"""
         # Check screen boundaries
@@ -98,7 +198,48 @@ class GameMap:
         if y - radius < 0 or y + radius > self.height:
             return False
         
-        # Check wall collisions
+        # pygame.Rect truncates float coordinates, so do the same here
+        left = int(x - radius)
+        top = int(y - radius)
+        size = int(radius * 2)
+        if 0 <= size <= CLEARANCE_LIMIT and left < self.width and top < self.height:
+            return self._clearance_view[top, left] >= size
+        
+        return self._scan_walls(x, y, radius)
+    
+    def are_valid_positions(self, xs, ys, radius):
+        """Vectorized is_valid_position for arrays of coordinates
+        
+        radius may be a scalar or an array broadcastable against xs/ys.
+        Returns a boolean array with the same answers as is_valid_position.
+        """
+        xs, ys, radius = np.broadcast_arrays(
+            np.asarray(xs, dtype=np.float64),
+            np.asarray(ys, dtype=np.float64),
+            np.asarray(radius, dtype=np.float64),
+        )
+        
+        # Check screen boundaries
+        valid = ((xs - radius >= 0) & (xs + radius <= self.width) &
+                 (ys - radius >= 0) & (ys + radius <= self.height))
+        
+        # Same truncation as pygame.Rect
+        left = np.trunc(xs - radius).astype(np.intp)
+        top = np.trunc(ys - radius).astype(np.intp)
+        size = np.trunc(radius * 2).astype(np.intp)
+        
+        lookup = (valid & (size >= 0) & (size <= CLEARANCE_LIMIT) &
+                  (left < self.width) & (top < self.height))
+        valid[lookup] = self.clearance[top[lookup], left[lookup]] >= size[lookup]
+        
+        # Entities too large for the clearance map use the wall scan
+        for i in np.flatnonzero(valid & ~lookup):
+            valid.flat[i] = self._scan_walls(xs.flat[i], ys.flat[i], radius.flat[i])
+        
+        return valid
+    
+    def _scan_walls(self, x, y, radius):
+        """Check an entity rect against every wall (slow path for very large entities)"""
         entity_rect = pygame.Rect(x - radius, y - radius, radius * 2, radius * 2)
         
         for wall in self.walls:
@@ -107,20 +248,39 @@ class GameMap:
         
         return True
     
-    def get_valid_positions(self):
-        """Get a list of valid positions for spawning collectibles"""
-        valid_positions = []
+    def get_spawn_points(self):
+        """Return the valid spawn grid points as an (n, 2) array, computed once per map"""
+        if self._spawn_points is None:
+            self._spawn_points = self.cached_array("spawn_points", self._compute_spawn_points)
+        return self._spawn_points
+    
+    def _compute_spawn_points(self):
+        """Grid points where a collectible fits"""
         step = 50  # Larger grid step for better spacing
+        xs = np.arange(step, self.width - step, step)
+        ys = np.arange(step, self.height - step, step)
+        grid_x, grid_y = np.meshgrid(xs, ys, indexing="ij")
         
-        for x in range(step, self.width - step, step):
-            for y in range(step, self.height - step, step):
-                if self.is_valid_position(x, y, 20):  # Use larger radius for more spacing
-                    valid_positions.append((x, y))
-        
-        return valid_positions
+        # Use larger radius for more spacing
+        spawn_mask = self.are_valid_positions(grid_x, grid_y, 20)
+        return np.column_stack((grid_x[spawn_mask], grid_y[spawn_mask]))
+    
+    def get_valid_positions(self):
+        """Get a list of valid positions for spawning collectibles"""
+        return [tuple(point) for point in self.get_spawn_points().tolist()]
+    
+    def sample_spawn_positions(self, count, rng=random):
+        """Pick up to count distinct spawn positions at random (without replacement)"""
+        spawn_points = self.get_spawn_points()
+        count = min(count, len(spawn_points))
+        indices = rng.sample(range(len(spawn_points)), count)
+        return [tuple(point) for point in spawn_points[indices].tolist()]
     
     def get_player_start_position(self):
         """Get a safe starting position for the player"""
+        if self.player_start is not None:
+            return self.player_start
+        
         # Start in a safe area (left side of the map)
         for x in range(60, 150, 20):
             for y in range(60, 150, 20):
@@ -130,17 +290,15 @@ class GameMap:
         # Fallback position
         return (80, 80)
     
-    def get_enemy_start_positions(self):
+    def get_enemy_start_positions(self, rng=random):
         """Get starting positions for enemies"""
+        if self.enemy_starts:
+            return list(self.enemy_starts)
+        
         positions = []
         
         # Try to place enemies in different areas of the map with better spacing
-        candidate_areas = [
-            (self.width - 200, 60, self.width - 60, 180),      # Top right
-            (self.width - 200, self.height - 180, self.width - 60, self.height - 60),  # Bottom right
-            (60, self.height - 180, 200, self.height - 60),     # Bottom left
-            (self.width // 2 - 80, self.height // 2 - 80, self.width // 2 + 80, self.height // 2 + 80)  # Center
-        ]
+        candidate_areas = self.enemy_start_areas()
         
         for i, (min_x, min_y, max_x, max_y) in enumerate(candidate_areas):
             if len(positions) >= 4:
@@ -148,8 +306,8 @@ class GameMap:
                 
             # Try to find a valid position in this area
             for attempt in range(100):  # More attempts
-                x = random.randint(min_x, max_x)
-                y = random.randint(min_y, max_y)
+                x = rng.randint(min_x, max_x)
+                y = rng.randint(min_y, max_y)
                 
                 if self.is_valid_position(x, y, 20):  # Larger spacing check
                     # Make sure it's not too close to other enemies
@@ -165,25 +323,100 @@ class GameMap:
                         break
         
         # If we couldn't place all 4 enemies, use fallback positions
+        while len(positions) < 4:
+            positions.append(self.enemy_fallback_position(len(positions)))
+        
+        return positions[:4]
+    
+    def enemy_start_areas(self):
+        """(min_x, min_y, max_x, max_y) areas the enemies start in, one per enemy"""
+        return [
+            (self.width - 200, 60, self.width - 60, 180),      # Top right
+            (self.width - 200, self.height - 180, self.width - 60, self.height - 60),  # Bottom right
+            (60, self.height - 180, 200, self.height - 60),     # Bottom left
+            (self.width // 2 - 80, self.height // 2 - 80, self.width // 2 + 80, self.height // 2 + 80)  # Center
+        ]
+    
+    def enemy_fallback_position(self, index):
+        """Start position for the index-th enemy when no spot in the areas was found"""
         fallback_positions = [
             (self.width - 100, 100),
             (self.width - 100, self.height - 100),
             (100, self.height - 100),
             (self.width // 2, self.height // 2)
         ]
-        
-        while len(positions) < 4:
-            fallback_pos = fallback_positions[len(positions)]
-            if self.is_valid_position(fallback_pos[0], fallback_pos[1], 15):
-                positions.append(fallback_pos)
-            else:
-                # Emergency fallback
-                positions.append((200 + len(positions) * 100, 200))
-        
-        return positions[:4]
+        fallback_pos = fallback_positions[index]
+        if self.is_valid_position(fallback_pos[0], fallback_pos[1], 15):
+            return fallback_pos
+        # Emergency fallback
+        return (200 + index * 100, 200)
+    
+    def get_background(self):
+        """Return the map (background and walls) pre-rendered into a surface"""
+        if self._background is None:
+            background = pygame.Surface((self.width, self.height))
+            background.fill(self.background_color)
+            for wall in self.walls:
+                pygame.draw.rect(background, self.wall_color, wall)
+            
+            # Match the display's pixel format for fast blits when there is one
+            if pygame.display.get_surface() is not None:
+                background = background.convert()
+            self._background = background
+        return self._background
     
     def draw(self, screen):
-        """Draw the map"""
-        # Draw walls
-        for wall in self.walls:
-            pygame.draw.rect(screen, self.wall_color, wall)
+        """Draw the map (this also clears everything drawn on top of it)"""
+        screen.blit(self.get_background(), (0, 0))
+    
+    def restore(self, screen, rect):
+        """Redraw the map under a single rect of the screen"""
+        screen.blit(self.get_background(), rect, rect)
+    
+    def _walls_by_chunk(self):
+        """{(chunk_x, chunk_y): [walls overlapping that chunk]}, built once"""
+        if self._chunk_walls is None:
+            chunk_walls = {}
+            for wall in self.walls:
+                for chunk_y in range(wall.top // CHUNK_SIZE, (wall.bottom - 1) // CHUNK_SIZE + 1):
+                    for chunk_x in range(wall.left // CHUNK_SIZE, (wall.right - 1) // CHUNK_SIZE + 1):
+                        chunk_walls.setdefault((chunk_x, chunk_y), []).append(wall)
+            self._chunk_walls = chunk_walls
+        return self._chunk_walls
+    
+    def _get_chunk(self, chunk_x, chunk_y):
+        """Pre-rendered surface for one CHUNK_SIZE square of the map"""
+        chunk = self._chunks.get((chunk_x, chunk_y))
+        if chunk is None:
+            left = chunk_x * CHUNK_SIZE
+            top = chunk_y * CHUNK_SIZE
+            chunk = pygame.Surface((CHUNK_SIZE, CHUNK_SIZE))
+            chunk.fill(self.background_color)
+            for wall in self._walls_by_chunk().get((chunk_x, chunk_y), ()):
+                pygame.draw.rect(chunk, self.wall_color, wall.move(-left, -top))
+            
+            if pygame.display.get_surface() is not None:
+                chunk = chunk.convert()
+            self._chunks[(chunk_x, chunk_y)] = chunk
+        return chunk
+    
+    def draw_view(self, screen, view):
+        """Draw the part of the map inside view (a world-space Rect) onto the screen
+        
+        Only the chunks that overlap the view are drawn, so the cost depends on
+        the screen size rather than the map size.
+        """
+        if not pygame.Rect(0, 0, self.width, self.height).contains(view):
+            screen.fill(self.background_color)
+        
+        first_x = max(0, view.left // CHUNK_SIZE)
+        first_y = max(0, view.top // CHUNK_SIZE)
+        last_x = min((self.width - 1) // CHUNK_SIZE, (view.right - 1) // CHUNK_SIZE)
+        last_y = min((self.height - 1) // CHUNK_SIZE, (view.bottom - 1) // CHUNK_SIZE)
+        
+        blits = []
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                position = (chunk_x * CHUNK_SIZE - view.left, chunk_y * CHUNK_SIZE - view.top)
+                blits.append((self._get_chunk(chunk_x, chunk_y), position))
+        screen.blits(blits, doreturn=False)
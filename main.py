@@ -1,18 +1,47 @@
+import argparse
 import pygame
 import sys
 import time
 from game import Game
 
+def parse_args():
+    """Command-line options"""
+    parser = argparse.ArgumentParser(description="Pacman-style game")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="redraw only the regions that changed each frame")
+    parser.add_argument("--tick-rate", type=int, default=60,
+                        help="game logic ticks per second (default 60)")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="maximum frames drawn per second, 0 for no limit (default 60)")
+    parser.add_argument("--map", dest="map_file",
+                        help="play on a tile map file (see tile_map.py) instead of the built-in map")
+    parser.add_argument("--seed", type=int, help="seed for the first game (random by default)")
+    parser.add_argument("--record", dest="record_file",
+                        help="save a replay of each finished game to this file (see replay.py)")
+    parser.add_argument("--path-budget", type=float, dest="path_budget_ms",
+                        help="give enemies their own goals (ambush, patrol), with up to this many "
+                             "milliseconds of path planning per tick")
+    parser.add_argument("--ai-thread", action="store_true",
+                        help="plan enemy moves on a background thread (games can't be recorded)")
+    args = parser.parse_args()
+    if args.ai_thread and args.record_file:
+        parser.error("--record can't be used with --ai-thread: those games don't replay exactly")
+    return args
+
 def main():
     """Main entry point for the Pacman-style game"""
+    args = parse_args()
     pygame.init()
     
     # Initialize the game
-    game = Game()
+    game = Game(dirty_rects=args.dirty_rects, tick_rate=args.tick_rate, map_file=args.map_file,
+                seed=args.seed, record_file=args.record_file, path_budget_ms=args.path_budget_ms,
+                ai_mode="thread" if args.ai_thread else "inline")
     
     # Game loop
     clock = pygame.time.Clock()
     running = True
+    previous_time = time.perf_counter()
     
     while running:
         # Handle events
@@ -22,18 +51,29 @@ def main():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r and game.game_over:
                     # Restart game
-                    game = Game()
+                    game.reset()
+                elif event.key == pygame.K_F3:
+                    # Toggle the frame profiler overlay
+                    game.toggle_profiler()
+                elif event.key == pygame.K_F4:
+                    # Save recent frame timings for chrome://tracing
+                    game.export_profile()
+        game.profiler.lap("events")
         
-        # Update game state
-        if not game.game_over:
-            game.update()
+        # Update game state: one clock sample per frame drives the fixed-timestep simulation
+        now = time.perf_counter()
+        game.advance(now - previous_time)
+        previous_time = now
         
-        # Draw everything
+        # Draw everything (interpolated between the last two ticks)
         game.draw()
         
-        # Control frame rate
-        clock.tick(60)
+        # Limit the render frame rate; the game runs at the same speed regardless
+        clock.tick(args.fps)
+        game.profiler.lap("wait")
+        game.profiler.end_frame()
     
+    game.simulation.close()
     pygame.quit()
     sys.exit()
 
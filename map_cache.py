@@ -0,0 +1,50 @@
+import os
+import numpy as np
+
+# Bump when the way any cached array is derived changes
+CACHE_VERSION = 1
+
+class MapCache:
+    """On-disk cache of arrays derived from a map (clearance, spawn points, navigation)
+
+    Each array is stored as cache_dir/v<CACHE_VERSION>/<map hash>/<name>.npy,
+    where the map hash comes from GameMap.content_hash(). Hits are
+    memory-mapped read-only, so loading costs the same however large the
+    map is and pages are only read when used.
+    """
+    def __init__(self, cache_dir="map_cache"):
+        self.cache_dir = cache_dir
+
+    def _filename(self, map_key, name):
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}", map_key, f"{name}.npy")
+
+    def get(self, map_key, name, build):
+        """Return the cached array, or build() it and store it on a miss"""
+        filename = self._filename(map_key, name)
+        array = self._load(filename)
+        if array is None:
+            array = build()
+            self._save(array, filename)
+        return array
+
+    def _load(self, filename):
+        """Memory-map a cached array, or return None if it is missing or unreadable"""
+        if not os.path.exists(filename):
+            return None
+        try:
+            return np.load(filename, mmap_mode="r")
+        except Exception as e:
+            print(f"Error loading cached map data {filename}: {e}")
+            return None
+
+    def _save(self, array, filename):
+        """Write an array to the cache (atomically, so readers never see half a file)"""
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            # Per-process temp name: several batch workers may fill the cache at once
+            temp_filename = f"{filename}.{os.getpid()}.tmp"
+            with open(temp_filename, "wb") as f:
+                np.save(f, array)
+            os.replace(temp_filename, filename)
+        except OSError as e:
+            print(f"Error saving cached map data {filename}: {e}")
@@ -0,0 +1,56 @@
+import numpy as np
+
+# Simple melody notes (C major scale, C4 to C5), one per second, looping
+MELODY = (261.63, 293.66, 329.63, 349.23, 392.00, 440.00, 493.88, 523.25)
+NOTE_SECONDS = 1.0
+VOLUME = 16383
+
+class MusicStream:
+    """Endless background music synthesised a chunk at a time
+
+    Each note (a sine plus its octave, with a decaying envelope) is rendered
+    once into an int16 wavetable the first time it is played; after that a
+    chunk is just copies out of the tables into one reused buffer. Memory
+    stays at one table per distinct note plus one chunk.
+    """
+    def __init__(self, sample_rate=22050, channels=2, melody=MELODY, note_seconds=NOTE_SECONDS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.melody = melody
+        self.note_frames = int(note_seconds * sample_rate)
+        self._wavetables = {}  # frequency -> int16 samples of one whole note
+
+    def _wavetable(self, frequency):
+        """The note's samples, rendered on first use"""
+        table = self._wavetables.get(frequency)
+        if table is None:
+            t = np.arange(self.note_frames) / self.sample_rate
+            note = (np.sin(2 * np.pi * frequency * t) * 0.4 +
+                    np.sin(2 * np.pi * frequency * 2 * t) * 0.2)
+            note *= np.exp(-t * 1.5)
+            table = (note * VOLUME).astype(np.int16)
+            self._wavetables[frequency] = table
+        return table
+
+    def chunks(self, chunk_frames):
+        """Yield (chunk_frames, channels) int16 arrays forever
+
+        The same buffer is refilled for every chunk, so each one must be
+        used (e.g. copied into a pygame Sound) before asking for the next.
+        """
+        buffer = np.empty((chunk_frames, self.channels), dtype=np.int16)
+        note_index = 0
+        position = 0  # Frames already played of the current note
+        while True:
+            filled = 0
+            while filled < chunk_frames:
+                table = self._wavetable(self.melody[note_index])
+                count = min(chunk_frames - filled, self.note_frames - position)
+                # Same samples on every output channel
+                buffer[filled:filled + count] = table[position:position + count, None]
+                filled += count
+                position += count
+                if position == self.note_frames:
+                    position = 0
+                    note_index = (note_index + 1) % len(self.melody)
+            yield buffer
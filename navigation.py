@@ -0,0 +1,264 @@
+import numpy as np
+
+# Flee field scaling: values below -1 make enemies prefer escape routes that
+# lead further away instead of getting cornered in the nearest dead end
+FLEE_COEFFICIENT = -1.2
+
+class NavGrid:
+    """Tile graph of the map for an entity of a given radius
+
+    A tile is walkable when an entity centred on it fits between the walls,
+    and walkable tiles are linked to their walkable up/down/left/right
+    neighbours. The graph is built once from GameMap's clearance data, and
+    its arrays go through the map's cache (see GameMap.cached_array).
+    """
+    def __init__(self, game_map, tile_size=10, radius=12):
+        self.tile_size = tile_size
+        self.radius = radius
+        self.cols = game_map.width // tile_size
+        self.rows = game_map.height // tile_size
+
+        cache_suffix = f"{tile_size}_{radius}"
+        self.walkable = game_map.cached_array(f"nav_walkable_{cache_suffix}",
+                                              lambda: self._compute_walkable(game_map))
+        self.neighbor_table = game_map.cached_array(f"nav_neighbors_{cache_suffix}",
+                                                    lambda: _neighbor_table(self.walkable))
+
+        # Neighbour lists of flat tile indices (index = row * cols + col),
+        # made from the table the first time a search visits each tile, so
+        # loading a map costs nothing per tile
+        self.neighbors = _NeighborLists(self.neighbor_table)
+        self._walkable_flat = memoryview(np.ascontiguousarray(self.walkable).ravel())
+
+    def _compute_walkable(self, game_map):
+        """(rows, cols) mask of the tiles whose centre fits an entity of this radius"""
+        centers_x = np.arange(self.cols) * self.tile_size + self.tile_size / 2
+        centers_y = np.arange(self.rows) * self.tile_size + self.tile_size / 2
+        grid_x, grid_y = np.meshgrid(centers_x, centers_y)
+        return game_map.are_valid_positions(grid_x, grid_y, self.radius)
+
+    def tile_at(self, x, y):
+        """Flat index of the tile containing (x, y), or None if off the grid"""
+        col = int(x // self.tile_size)
+        row = int(y // self.tile_size)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return None
+
+    def is_walkable(self, tile):
+        return self._walkable_flat[tile]
+
+    def tile_center(self, tile):
+        """Pixel centre of a flat tile index"""
+        row, col = divmod(tile, self.cols)
+        half = self.tile_size / 2
+        return (col * self.tile_size + half, row * self.tile_size + half)
+
+    def nearby_tiles(self, tile):
+        """The tile and its eight surrounding tiles that exist on the grid"""
+        row, col = divmod(tile, self.cols)
+        tiles = []
+        for r in range(max(0, row - 1), min(self.rows, row + 2)):
+            for c in range(max(0, col - 1), min(self.cols, col + 2)):
+                tiles.append(r * self.cols + c)
+        return tiles
+
+def _neighbor_table(walkable):
+    """(tiles, 4) int32 table of each tile's walkable neighbours, padded with -1
+
+    Neighbours are listed left, right, up, down, with the -1 padding at the
+    end of each row. Non-walkable tiles have no neighbours.
+    """
+    rows, cols = walkable.shape
+    index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    table = np.full((rows, cols, 4), -1, dtype=np.int32)
+
+    linked = walkable[:, 1:] & walkable[:, :-1]
+    table[:, 1:, 0] = np.where(linked, index[:, :-1], -1)  # Left
+    table[:, :-1, 1] = np.where(linked, index[:, 1:], -1)  # Right
+    linked = walkable[1:] & walkable[:-1]
+    table[1:, :, 2] = np.where(linked, index[:-1], -1)  # Up
+    table[:-1, :, 3] = np.where(linked, index[1:], -1)  # Down
+
+    # Move the padding to the end while keeping the direction order
+    table = table.reshape(-1, 4)
+    order = np.argsort(table < 0, axis=1, kind="stable")
+    return np.take_along_axis(table, order, axis=1)
+
+class _NeighborLists(dict):
+    """tile -> list of its walkable neighbours, filled in from a neighbour table on first lookup
+
+    Lookups of tiles already seen are plain dict hits, which the searches
+    iterate as fast as a list of lists.
+    """
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def __missing__(self, tile):
+        row = self.table[tile].tolist()
+        if -1 in row:
+            row = row[:row.index(-1)]
+        self[tile] = row
+        return row
+
+class FlowField:
+    """Shared chase and flee fields toward the player over a NavGrid
+
+    The chase field is a BFS distance from the player's tile, rebuilt only
+    when the player moves to another tile. The flee field is derived from it
+    on demand (only while enemies are fleeing). Enemies read their next step
+    with chase_target / flee_target in constant time.
+
+    On large maps, max_distance stops the search that many steps from the
+    player so a rebuild costs the same however big the map is; enemies
+    further away get no target and fall back to their simple movement.
+    The per-tile fields are allocated once and a rebuild only clears the
+    tiles the previous search reached.
+    """
+    def __init__(self, nav_grid, max_distance=None):
+        self.nav_grid = nav_grid
+        self.max_distance = max_distance
+        self.goal_tile = None
+        self.distance = []
+        self._reached = []  # Tiles with a distance, in BFS order
+        self._flee = None  # The flee field once built for the current distance field
+        self._flee_buffer = []
+
+    def update(self, player_x, player_y):
+        """Rebuild the chase field if the player has changed tile"""
+        tile = self.nav_grid.tile_at(player_x, player_y)
+        if tile is None or tile == self.goal_tile:
+            return
+        self.goal_tile = tile
+        self._clear()
+        self._build_distance(tile)
+
+    def _clear(self):
+        """Reset the tiles the last search reached to None in both fields"""
+        distance = self.distance
+        flee = self._flee
+        for tile in self._reached:
+            distance[tile] = None
+            if flee is not None:
+                flee[tile] = None
+        self._reached = []
+        self._flee = None
+
+    def _build_distance(self, goal):
+        """Breadth-first search from the goal tile over walkable tiles"""
+        nav_grid = self.nav_grid
+        neighbors = nav_grid.neighbors
+        distance = self.distance  # None = unreachable
+        if not distance:
+            distance = [None] * (nav_grid.rows * nav_grid.cols)
+
+        # The player may stand on a tile too tight for an enemy, so seed from
+        # the goal's walkable surroundings as well
+        distance[goal] = 0
+        reached = [goal]
+        frontier = []
+        for tile in nav_grid.nearby_tiles(goal):
+            if distance[tile] is None and nav_grid.is_walkable(tile):
+                distance[tile] = 1
+                frontier.append(tile)
+        reached.extend(frontier)
+        if nav_grid.is_walkable(goal):
+            frontier.append(goal)
+
+        # Expand one ring at a time
+        level = 1
+        max_distance = self.max_distance
+        while frontier and (max_distance is None or level < max_distance):
+            level += 1
+            next_frontier = []
+            for tile in frontier:
+                for neighbor in neighbors[tile]:
+                    if distance[neighbor] is None:
+                        distance[neighbor] = level
+                        next_frontier.append(neighbor)
+            reached.extend(next_frontier)
+            frontier = next_frontier
+
+        self.distance = distance
+        self._reached = reached
+
+    def _build_flee(self):
+        """Relax the scaled chase field into a 'flee map'
+
+        Values are kept as integers (scaled by 5 so that FLEE_COEFFICIENT
+        becomes -6 and each step costs 5), which lets Dial's bucket queue
+        replace a binary heap.
+        """
+        neighbors = self.nav_grid.neighbors
+        step_cost = 5
+        scale = round(FLEE_COEFFICIENT * step_cost)
+        flee = self._flee_buffer  # None outside the chase field
+        if not flee:
+            flee = self._flee_buffer = [None] * len(self.distance)
+
+        # BFS order means the last tile reached is the furthest
+        max_distance = self.distance[self._reached[-1]]
+        offset = -scale * max_distance
+        buckets = [[] for _ in range(offset + 1)]
+        for tile in self._reached:
+            flee[tile] = self.distance[tile] * scale
+            buckets[flee[tile] + offset].append(tile)
+
+        # Values only ever decrease below their start, so all buckets fit in range
+        for bucket_value, bucket in enumerate(buckets):
+            value = bucket_value - offset
+            for tile in bucket:
+                if flee[tile] != value:
+                    continue
+                candidate = value + step_cost
+                for neighbor in neighbors[tile]:
+                    # Tiles past max_distance stay outside the field
+                    current = flee[neighbor]
+                    if current is not None and candidate < current:
+                        flee[neighbor] = candidate
+                        buckets[candidate + offset].append(neighbor)
+
+        self._flee = flee
+
+    def _next_tile(self, x, y, field):
+        """Tile an enemy at (x, y) should head for to descend the given field"""
+        nav_grid = self.nav_grid
+        tile = nav_grid.tile_at(x, y)
+        if tile is None or not field:
+            return None
+
+        if nav_grid.is_walkable(tile) and field[tile] is not None:
+            candidates = nav_grid.neighbors[tile]
+            best_tile, best_value = tile, field[tile]
+        else:
+            # Squeezed against a wall: head for the best tile around us
+            candidates = nav_grid.nearby_tiles(tile)
+            best_tile, best_value = None, None
+
+        for candidate in candidates:
+            value = field[candidate]
+            if value is None or not nav_grid.is_walkable(candidate):
+                continue
+            if best_value is None or value < best_value:
+                best_tile, best_value = candidate, value
+        return best_tile
+
+    def chase_target(self, x, y):
+        """Pixel target of the next step toward the player, or None off the field"""
+        tile = self._next_tile(x, y, self.distance)
+        if tile is None or self.distance[tile] <= 1:
+            # Next to the player: aim straight at them
+            return None
+        return self.nav_grid.tile_center(tile)
+
+    def flee_target(self, x, y):
+        """Pixel target of the next step away from the player, or None off the field"""
+        if self._flee is None:
+            if not self.distance:
+                return None
+            self._build_flee()
+        tile = self._next_tile(x, y, self._flee)
+        if tile is None:
+            return None
+        return self.nav_grid.tile_center(tile)
@@ -0,0 +1,370 @@
+import heapq
+import time
+from collections import OrderedDict
+
+# Enemy roles handed out by EnemyDirector, in turn
+ROLE_CHASE = "chase"  # Follow the shared flow field straight to the player
+ROLE_AMBUSH = "ambush"  # Head for a spot ahead of the player
+ROLE_PATROL = "patrol"  # Tour the corners of the map
+ROLES = (ROLE_CHASE, ROLE_AMBUSH, ROLE_PATROL)
+
+# Ambushers aim this many tiles ahead of the player
+AMBUSH_LEAD = 8
+
+# A route is kept while its goal stays within this many tiles of the path's end
+REPLAN_DISTANCE = 3
+
+# A path that arrives while the enemy is moving is picked up if the enemy
+# is within this many tiles of its start
+PATH_PICKUP_TILES = 8
+
+# Roughly how many A* node expansions one millisecond of searching buys, for
+# turning a time budget into an expansion budget that repeats exactly. This
+# is approximate and machine-dependent: the "PathPlanner.run" benchmark case
+# measures what a 1 ms budget really costs (it was about 400 when last checked).
+EXPANSIONS_PER_MS = 400
+
+class _Search:
+    """State of one A* search, so it can be paused and resumed"""
+    __slots__ = ("start", "goal", "open", "cost", "came_from", "last_request")
+
+    def __init__(self, start, goal, heuristic, frame):
+        self.start = start
+        self.goal = goal
+        self.open = [(heuristic, 0, start)]  # (cost + heuristic, cost, tile)
+        self.cost = {start: 0}
+        self.came_from = {start: None}
+        self.last_request = frame
+
+class PathPlanner:
+    """A* shortest paths over a NavGrid, shared through an LRU cache
+
+    Paths are lists of flat tile indices from start to goal (inclusive), or
+    None when the goal can't be reached. request() answers from the cache or
+    queues a search; run() works on queued searches until its time budget
+    is spent, pausing a search mid-way if needed and resuming it next time.
+    Searches nobody asked for since the previous run() are dropped.
+
+    max_expansions replaces the time budget with a fixed number of node
+    expansions per run(), so results don't depend on how fast the machine is.
+    """
+    def __init__(self, nav_grid, cache_size=512, budget_ms=1.0, clock=time.perf_counter, max_expansions=None):
+        self.nav_grid = nav_grid
+        self.cache_size = cache_size
+        self.budget_ms = budget_ms
+        self.clock = clock
+        self.max_expansions = max_expansions
+        self._cache = OrderedDict()  # (start, goal) -> path or None
+        self._pending = OrderedDict()  # (start, goal) -> _Search, oldest first
+        self._frame = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.expansions = 0
+
+    def heuristic(self, tile, goal):
+        """Manhattan distance in tiles (exact on an open 4-connected grid)"""
+        cols = self.nav_grid.cols
+        row, col = divmod(tile, cols)
+        goal_row, goal_col = divmod(goal, cols)
+        return abs(row - goal_row) + abs(col - goal_col)
+
+    def cached(self, start, goal):
+        """(True, path) if the pair is in the cache, else (False, None)"""
+        key = (start, goal)
+        cache = self._cache
+        if key in cache:
+            cache.move_to_end(key)
+            return True, cache[key]
+        return False, None
+
+    def request(self, start, goal):
+        """Cached path from start to goal, or None while it is still being searched"""
+        found, path = self.cached(start, goal)
+        if found:
+            self.hits += 1
+            return path
+
+        key = (start, goal)
+        search = self._pending.get(key)
+        if search is None:
+            self.misses += 1
+            self._pending[key] = _Search(start, goal, self.heuristic(start, goal), self._frame)
+        else:
+            search.last_request = self._frame
+        return None
+
+    def run(self, budget_ms=None):
+        """Work on queued searches for up to budget_ms (default self.budget_ms)
+
+        Returns the number of searches finished.
+        """
+        if self.max_expansions is not None:
+            deadline = None
+            limit = self.expansions + self.max_expansions
+        else:
+            budget_ms = self.budget_ms if budget_ms is None else budget_ms
+            deadline = self.clock() + budget_ms / 1000
+            limit = None
+        pending = self._pending
+
+        # Drop searches that weren't asked for since the last run
+        stale = self._frame
+        for key in [key for key, search in pending.items() if search.last_request < stale]:
+            del pending[key]
+        self._frame += 1
+
+        finished = 0
+        while pending:
+            key, search = next(iter(pending.items()))
+            done, path = self._advance(search, deadline, limit)
+            if not done:
+                break
+            del pending[key]
+            self._store(key, path)
+            finished += 1
+        return finished
+
+    def find_path(self, start, goal):
+        """Search (or look up) a path right away, ignoring the time budget"""
+        found, path = self.cached(start, goal)
+        if found:
+            return path
+        search = _Search(start, goal, self.heuristic(start, goal), self._frame)
+        _, path = self._advance(search, None, None)
+        self._store((start, goal), path)
+        return path
+
+    def _store(self, key, path):
+        cache = self._cache
+        cache[key] = path
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _advance(self, search, deadline, limit):
+        """Expand nodes until the search ends, the deadline passes or self.expansions
+        reaches limit: (done, path)"""
+        neighbors = self.nav_grid.neighbors
+        cols = self.nav_grid.cols
+        goal = search.goal
+        goal_row, goal_col = divmod(goal, cols)
+        open_heap = search.open
+        cost = search.cost
+        came_from = search.came_from
+        clock = self.clock
+
+        expansions = 0
+        allowed = None if limit is None else limit - self.expansions
+        while open_heap:
+            # Checking the clock is slow compared to an expansion, so only do it now and then
+            if deadline is not None and expansions & 63 == 63 and clock() >= deadline:
+                self.expansions += expansions
+                return False, None
+            if allowed is not None and expansions >= allowed:
+                self.expansions += expansions
+                return False, None
+
+            _, tile_cost, tile = heapq.heappop(open_heap)
+            if tile_cost > cost[tile]:
+                continue  # A cheaper entry for this tile was already expanded
+            expansions += 1
+            if tile == goal:
+                self.expansions += expansions
+                return True, self._reconstruct(came_from, goal)
+
+            next_cost = tile_cost + 1
+            for neighbor in neighbors[tile]:
+                old_cost = cost.get(neighbor)
+                if old_cost is None or next_cost < old_cost:
+                    cost[neighbor] = next_cost
+                    came_from[neighbor] = tile
+                    row, col = divmod(neighbor, cols)
+                    estimate = next_cost + abs(row - goal_row) + abs(col - goal_col)
+                    heapq.heappush(open_heap, (estimate, next_cost, neighbor))
+
+        self.expansions += expansions
+        return True, None
+
+    @staticmethod
+    def _reconstruct(came_from, goal):
+        path = []
+        tile = goal
+        while tile is not None:
+            path.append(tile)
+            tile = came_from[tile]
+        path.reverse()
+        return path
+
+    def nearest_walkable(self, tile, max_radius=8):
+        """The walkable tile closest to a tile (itself if walkable), or None"""
+        nav_grid = self.nav_grid
+        if nav_grid.is_walkable(tile):
+            return tile
+        row, col = divmod(tile, nav_grid.cols)
+        for radius in range(1, max_radius + 1):
+            for r in range(max(0, row - radius), min(nav_grid.rows, row + radius + 1)):
+                for c in range(max(0, col - radius), min(nav_grid.cols, col + radius + 1)):
+                    if max(abs(r - row), abs(c - col)) == radius and nav_grid.is_walkable(r * nav_grid.cols + c):
+                        return r * nav_grid.cols + c
+        return None
+
+class _Route:
+    """One enemy's goal and the path it is following; looks like a FlowField to Enemy.update"""
+    __slots__ = ("director", "role", "path", "index", "corner", "pending")
+
+    def __init__(self, director, role, corner):
+        self.director = director
+        self.role = role
+        self.path = None
+        self.index = 0
+        self.corner = corner
+        self.pending = None  # (start, goal) of the search we are waiting for
+
+    def chase_target(self, x, y):
+        director = self.director
+        if self.role == ROLE_CHASE:
+            return director.flow_field.chase_target(x, y)
+
+        step = self._follow(x, y)
+        if step is None:
+            # No path (yet): fall back to the shared field
+            return director.flow_field.chase_target(x, y)
+        return step
+
+    def flee_target(self, x, y):
+        return self.director.flow_field.flee_target(x, y)
+
+    def _goal(self):
+        director = self.director
+        if self.role == ROLE_AMBUSH:
+            return director.ambush_tile
+        return director.corners[self.corner]
+
+    def _follow(self, x, y):
+        """Pixel target of the next step along the route, planning it if needed"""
+        director = self.director
+        planner = director.planner
+        nav_grid = planner.nav_grid
+        goal = self._goal()
+        tile = nav_grid.tile_at(x, y)
+        if goal is None or tile is None:
+            return None
+
+        path = self.path
+        if path is not None and planner.heuristic(path[-1], goal) > REPLAN_DISTANCE:
+            path = None
+
+        # Find ourselves on the path, a little ahead of where we were
+        if path is not None:
+            window = path[self.index:self.index + 3]
+            if tile in window:
+                self.index += window.index(tile)
+            else:
+                path = None
+
+        if path is None:
+            path = self._request(tile, goal)
+            if path is None:
+                self.path = None
+                return None
+        self.path = path
+
+        if self.index + 1 >= len(path):
+            # Arrived: patrollers move on to the next corner
+            if self.role == ROLE_PATROL:
+                self.corner = (self.corner + 1) % len(director.corners)
+            self.path = None
+            return None
+        return nav_grid.tile_center(path[self.index + 1])
+
+    def _request(self, tile, goal):
+        """Ask the planner for a path to goal, sticking with a search already under way
+
+        The enemy keeps moving while its search runs, so a finished path is
+        accepted if the enemy is still near its start.
+        """
+        planner = self.director.planner
+        if self.pending is not None and planner.heuristic(self.pending[1], goal) <= REPLAN_DISTANCE:
+            path = planner.request(*self.pending)
+            if path is None:
+                return None
+            self.pending = None
+            head = path[:PATH_PICKUP_TILES]
+            if tile in head:
+                self.index = head.index(tile)
+                return path
+
+        start = planner.nearest_walkable(tile, 1)
+        if start is None:
+            return None
+        path = planner.request(start, goal)
+        self.index = 0
+        if path is None:
+            self.pending = (start, goal)
+        return path
+
+class EnemyDirector:
+    """Gives each enemy its own goal and steers it there along planned paths
+
+    Roles go round ROLES in the order enemies were added: chasers use the
+    shared flow field, ambushers aim AMBUSH_LEAD tiles ahead of the player,
+    and patrollers tour the map's corners (each starting at a different
+    one). Paths come from the PathPlanner, which gets its time budget once
+    per tick in begin_tick; until a path is ready an enemy follows the flow
+    field. Fleeing always uses the flow field.
+    """
+    def __init__(self, planner, flow_field):
+        self.planner = planner
+        self.flow_field = flow_field
+        self.ambush_tile = None
+        self._routes = {}
+
+        # Walkable tiles nearest the four corners, clockwise from top left
+        nav_grid = planner.nav_grid
+        corners = []
+        for row, col in ((0, 0), (0, nav_grid.cols - 1), (nav_grid.rows - 1, nav_grid.cols - 1),
+                         (nav_grid.rows - 1, 0)):
+            corner = planner.nearest_walkable(row * nav_grid.cols + col, max(nav_grid.rows, nav_grid.cols))
+            if corner is not None:
+                corners.append(corner)
+        self.corners = corners
+
+    def reset(self, enemies):
+        """Hand out roles to a new game's enemies"""
+        self._routes = {}
+        patrollers = 0
+        for index, enemy in enumerate(enemies):
+            role = ROLES[index % len(ROLES)]
+            if role == ROLE_PATROL:
+                if not self.corners:
+                    role = ROLE_CHASE
+                else:
+                    patrollers += 1
+            self._routes[enemy] = _Route(self, role, patrollers % max(1, len(self.corners)))
+
+    def begin_tick(self, player):
+        """Update the ambush point from the player's movement and run the planner"""
+        planner = self.planner
+        nav_grid = planner.nav_grid
+        tile = nav_grid.tile_at(player.x, player.y)
+        self.ambush_tile = None
+        if tile is not None:
+            # Step back from the full lead until the spot is walkable
+            row, col = divmod(tile, nav_grid.cols)
+            for lead in range(AMBUSH_LEAD, -1, -1):
+                r = min(nav_grid.rows - 1, max(0, row + player.dy * lead))
+                c = min(nav_grid.cols - 1, max(0, col + player.dx * lead))
+                ahead = r * nav_grid.cols + c
+                if nav_grid.is_walkable(ahead):
+                    self.ambush_tile = ahead
+                    break
+            else:
+                self.ambush_tile = planner.nearest_walkable(tile)
+        planner.run()
+
+    def navigator(self, enemy):
+        """What to pass to Enemy.update in place of the flow field"""
+        route = self._routes.get(enemy)
+        return route if route is not None else self.flow_field
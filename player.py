@@ -1,32 +1,68 @@
 import pygame
 import math
 
+# Input bits for one tick of player movement
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+
+def input_from_keys(keys):
+    """Convert a pygame key state (pygame.key.get_pressed()) into an input bitmask"""
+    input_mask = 0
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        input_mask |= INPUT_LEFT
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        input_mask |= INPUT_RIGHT
+    if keys[pygame.K_UP] or keys[pygame.K_w]:
+        input_mask |= INPUT_UP
+    if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        input_mask |= INPUT_DOWN
+    return input_mask
+
 class Player:
+    # Per-instance state only; constants live on the class
+    __slots__ = ("x", "y", "prev_x", "prev_y", "speed", "power_speed", "dx", "dy")
+    
+    radius = 15
+    color = (255, 255, 0)  # Yellow
+    # Default speeds (instances may be rescaled, see Simulation._scale_to_tick_rate)
+    SPEED = 3
+    POWER_SPEED = 4.5  # Faster speed during power-up
+    
     def __init__(self, x, y):
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        """Put the player back at (x, y) with default speeds, standing still"""
         self.x = x
         self.y = y
-        self.radius = 15
-        self.speed = 3
-        self.power_speed = 4.5  # Faster speed during power-up
-        self.color = (255, 255, 0)  # Yellow
+        # Position before the last update, for interpolated drawing
+        self.prev_x = x
+        self.prev_y = y
+        self.speed = self.SPEED
+        self.power_speed = self.POWER_SPEED
         
         # Movement
         self.dx = 0
         self.dy = 0
     
-    def update(self, keys, game_map, power_up_active):
-        """Update player position based on input"""
+    def update(self, input_mask, game_map, power_up_active):
+        """Update player position based on an input bitmask (see input_from_keys)"""
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
         # Determine movement direction
         self.dx = 0
         self.dy = 0
         
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        if input_mask & INPUT_LEFT:
             self.dx = -1
-        elif keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        elif input_mask & INPUT_RIGHT:
             self.dx = 1
-        elif keys[pygame.K_UP] or keys[pygame.K_w]:
+        elif input_mask & INPUT_UP:
             self.dy = -1
-        elif keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        elif input_mask & INPUT_DOWN:
             self.dy = 1
         
         # Apply speed based on power-up status
@@ -41,9 +77,20 @@ class Player:
             self.x = new_x
             self.y = new_y
     
-    def draw(self, screen):
-        """Draw the player"""
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+    def render_position(self, alpha):
+        """Position interpolated between the last two updates (alpha 0..1)"""
+        if alpha >= 1.0:
+            return (self.x, self.y)
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+    
+    def draw(self, screen, alpha=1.0, offset=(0, 0)):
+        """Draw the player (offset is the camera's world position)"""
+        x, y = self.render_position(alpha)
+        x -= offset[0]
+        y -= offset[1]
+        
+        pygame.draw.circle(screen, self.color, (int(x), int(y)), self.radius)
         
         # Draw a small mouth to make it look more like Pacman
         mouth_angle = 30  # degrees
@@ -66,10 +113,10 @@ class Player:
         
         # Draw the mouth (a small pie slice)
         if self.dx != 0 or self.dy != 0:  # Only draw mouth if moving
-            mouth_points = [(int(self.x), int(self.y))]
+            mouth_points = [(int(x), int(y))]
             for angle in [start_angle, end_angle]:
-                mouth_x = self.x + math.cos(angle) * self.radius
-                mouth_y = self.y + math.sin(angle) * self.radius
+                mouth_x = x + math.cos(angle) * self.radius
+                mouth_y = y + math.sin(angle) * self.radius
                 mouth_points.append((int(mouth_x), int(mouth_y)))
             
             if len(mouth_points) >= 3:
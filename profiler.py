@@ -0,0 +1,85 @@
+import json
+import math
+import time
+from collections import deque
+
+class FrameProfiler:
+    """Per-phase frame timer with a ring buffer of recent frames
+
+    Code marks the end of each phase with lap(name); the time since the
+    previous lap is charged to that phase. end_frame() closes the frame.
+    When the profiler is disabled, lap() and end_frame() return right away,
+    so the calls can stay in the game loop permanently.
+    """
+    def __init__(self, capacity=300, enabled=False):
+        self.enabled = enabled
+        self.frames = deque(maxlen=capacity)  # each frame: [(phase, start, end), ...]
+        self._current = []
+        self._last = time.perf_counter()
+
+    def enable(self, enabled=True):
+        """Turn profiling on or off (starting from a clean frame)"""
+        self.enabled = enabled
+        self._current = []
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to a phase"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current.append((phase, self._last, now))
+        self._last = now
+
+    def end_frame(self):
+        """Store the current frame in the ring buffer and start a new one"""
+        if not self.enabled:
+            return
+        self.frames.append(self._current)
+        self._current = []
+
+    def clear(self):
+        self.frames.clear()
+        self._current = []
+
+    def phase_stats(self):
+        """{phase: (p50_ms, p99_ms)} over the frames in the buffer, in first-seen order"""
+        durations = {}
+        for frame in self.frames:
+            totals = {}
+            for phase, start, end in frame:
+                totals[phase] = totals.get(phase, 0.0) + (end - start)
+            for phase, total in totals.items():
+                durations.setdefault(phase, []).append(total * 1000)
+
+        stats = {}
+        for phase, values in durations.items():
+            values.sort()
+            stats[phase] = (_percentile(values, 50), _percentile(values, 99))
+        return stats
+
+    def export_chrome_trace(self, filename):
+        """Write the buffered frames as Chrome trace JSON (chrome://tracing, Perfetto)"""
+        events = []
+        for frame_number, frame in enumerate(self.frames):
+            for phase, start, end in frame:
+                events.append({
+                    "name": phase,
+                    "cat": "frame",
+                    "ph": "X",
+                    "ts": start * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                    "args": {"frame": frame_number},
+                })
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
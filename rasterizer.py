@@ -0,0 +1,148 @@
+import numpy as np
+import pygame
+
+# Channels of a rasterized grid
+CHANNEL_WALLS = 0
+CHANNEL_PLAYER = 1
+CHANNEL_ENEMIES = 2
+CHANNEL_SCARED_ENEMIES = 3  # Must directly follow CHANNEL_ENEMIES (see rasterize_batch)
+CHANNEL_GEMS = 4
+CHANNEL_POWER_UPS = 5
+CHANNEL_COUNT = 6
+
+class GridRasterizer:
+    """Writes the game state into a (channels, rows, cols) grid at any resolution
+
+    Each cell holds 1 for walls and, on the other channels, the number of
+    entities whose centre lies in that cell. Output goes into a buffer the
+    caller allocates once (see allocate) and passes in every tick; only the
+    cells that change are written, so nothing is allocated per frame.
+    """
+    def __init__(self, game_map, cols, rows):
+        if not (0 < cols <= game_map.width and 0 < rows <= game_map.height):
+            raise ValueError("grid must have between 1 and one cell per map pixel on each axis")
+        self.game_map = game_map
+        self.cols = cols
+        self.rows = rows
+        self.cell_width = game_map.width / cols
+        self.cell_height = game_map.height / rows
+
+        # A cell is a wall cell if any pixel in it is inside a wall
+        # (zero clearance means the pixel itself is covered)
+        wall_pixels = np.asarray(game_map.clearance) == 0
+        row_starts = np.ceil(np.arange(rows) * self.cell_height).astype(np.intp)
+        col_starts = np.ceil(np.arange(cols) * self.cell_width).astype(np.intp)
+        walls = np.logical_or.reduceat(wall_pixels, row_starts, axis=0)
+        self.walls = np.logical_or.reduceat(walls, col_starts, axis=1)
+
+        # Index buffers for rasterize_batch, sized on first use
+        self._batch_buffers = None
+
+    def allocate(self, batch_size=None, dtype=np.uint8):
+        """A zeroed buffer of the right shape, optionally with a leading batch axis"""
+        shape = (CHANNEL_COUNT, self.rows, self.cols)
+        if batch_size is not None:
+            shape = (batch_size,) + shape
+        return np.zeros(shape, dtype=dtype)
+
+    def _cell(self, x, y):
+        """(row, col) of the cell containing a point, clamped to the grid"""
+        row = min(self.rows - 1, max(0, int(y / self.cell_height)))
+        col = min(self.cols - 1, max(0, int(x / self.cell_width)))
+        return row, col
+
+    def rasterize(self, simulation, out):
+        """Write a Simulation's state into out (shape (CHANNEL_COUNT, rows, cols))"""
+        out[CHANNEL_WALLS] = self.walls
+        out[CHANNEL_PLAYER:] = 0
+
+        player = simulation.player
+        row, col = self._cell(player.x, player.y)
+        out[CHANNEL_PLAYER, row, col] = 1
+
+        enemy_channel = CHANNEL_SCARED_ENEMIES if simulation.power_up_active else CHANNEL_ENEMIES
+        for channel, entities in ((enemy_channel, simulation.enemies),
+                                  (CHANNEL_GEMS, simulation.gems),
+                                  (CHANNEL_POWER_UPS, simulation.power_ups)):
+            for entity in entities:
+                row, col = self._cell(entity.x, entity.y)
+                out[channel, row, col] += 1
+        return out
+
+    def rasterize_batch(self, env, out):
+        """Write every game of a vector_env.VectorEnv into out (shape (num_envs, CHANNEL_COUNT, rows, cols))"""
+        out[:, CHANNEL_WALLS] = self.walls
+        out[:, CHANNEL_PLAYER:] = 0
+
+        buffers = self._get_batch_buffers(env)
+        envs = buffers["envs"]
+
+        rows, cols = self._cells_into(env.player_x[:, None], env.player_y[:, None], buffers["player"])
+        out[envs, CHANNEL_PLAYER, rows, cols] = 1
+
+        # Scared enemies go one channel up
+        enemy_channel = buffers["enemy_channel"]
+        np.add(CHANNEL_ENEMIES, env.power_up_active[:, None], out=enemy_channel)
+        enemy_x = env.enemies.x.reshape(env.num_envs, env.enemy_count)
+        enemy_y = env.enemies.y.reshape(env.num_envs, env.enemy_count)
+        rows, cols = self._cells_into(enemy_x, enemy_y, buffers["enemies"])
+        np.add.at(out, (envs, enemy_channel, rows, cols), env.enemy_alive)
+
+        rows, cols = self._cells_into(env.gem_x, env.gem_y, buffers["gems"])
+        np.add.at(out, (envs, CHANNEL_GEMS, rows, cols), env.gem_alive)
+
+        rows, cols = self._cells_into(env.power_up_x, env.power_up_y, buffers["power_ups"])
+        np.add.at(out, (envs, CHANNEL_POWER_UPS, rows, cols), env.power_up_alive)
+        return out
+
+    def _get_batch_buffers(self, env):
+        """Preallocated cell index arrays for an env's entity counts"""
+        buffers = self._batch_buffers
+        n = env.num_envs
+        if buffers is None or buffers["envs"].shape[0] != n:
+            def cell_buffers(count):
+                return (np.empty((n, count)), np.empty((n, count), dtype=np.intp),
+                        np.empty((n, count), dtype=np.intp))
+
+            buffers = {
+                "envs": np.arange(n)[:, None],
+                "enemy_channel": np.empty((n, 1), dtype=np.intp),
+                "player": cell_buffers(1),
+                "enemies": cell_buffers(env.enemy_count),
+                "gems": cell_buffers(env.gem_count),
+                "power_ups": cell_buffers(env.power_up_count),
+            }
+            self._batch_buffers = buffers
+        return buffers
+
+    def _cells_into(self, xs, ys, buffers):
+        """Clamped (rows, cols) cell indices of point arrays, written into preallocated buffers"""
+        scratch, rows, cols = buffers
+        np.divide(ys, self.cell_height, out=scratch)
+        rows[...] = scratch
+        np.clip(rows, 0, self.rows - 1, out=rows)
+        np.divide(xs, self.cell_width, out=scratch)
+        cols[...] = scratch
+        np.clip(cols, 0, self.cols - 1, out=cols)
+        return rows, cols
+
+class ScreenView:
+    """Zero-copy access to a surface's pixels through pygame.surfarray.pixels3d
+
+        with ScreenView(game.screen) as pixels:
+            ...  # pixels is a (width, height, 3) uint8 array backed by the surface
+
+    The surface is locked (and can't be blitted to) while the view is open,
+    so keep the with-block short and don't hold on to the array after it.
+    """
+    def __init__(self, surface):
+        self.surface = surface
+        self.pixels = None
+
+    def __enter__(self):
+        self.pixels = pygame.surfarray.pixels3d(self.surface)
+        return self.pixels
+
+    def __exit__(self, *exc_info):
+        # Dropping the last reference releases the surface lock
+        self.pixels = None
@@ -0,0 +1,169 @@
+"""Record games as compact input logs and play them back at full speed
+
+A replay stores a game's seed, settings and one 4-bit input mask per tick
+(packed two ticks per byte and zlib-compressed), which is all a Simulation
+needs to reproduce the game exactly. A two-minute game fits in a few KB.
+
+    python main.py --record last_game.replay     # record while playing
+    python replay.py last_game.replay             # play back headless and verify
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+# Playback only needs pygame.Rect, so keep its banner quiet
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+from game_map import GameMap
+from simulation import Simulation
+
+MAGIC = b"PMRP"
+FORMAT_VERSION = 1
+
+# Simulation attributes that change how a game plays out
+SETTINGS = ("tick_rate", "gem_count", "power_up_count", "active_radius", "game_duration",
+            "power_up_duration", "enemy_speed", "enemy_scared_speed", "path_budget_ms", "ai_mode")
+
+def pack_inputs(input_masks):
+    """Pack 4-bit input masks two per byte (first tick in the low nibble) and compress"""
+    masks = np.asarray(input_masks, dtype=np.uint8)
+    if len(masks) % 2:
+        masks = np.append(masks, np.uint8(0))
+    packed = masks[0::2] | (masks[1::2] << 4)
+    return zlib.compress(packed.tobytes(), 9)
+
+def unpack_inputs(data, count):
+    """Inverse of pack_inputs"""
+    packed = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    masks = np.empty(len(packed) * 2, dtype=np.uint8)
+    masks[0::2] = packed & 0x0F
+    masks[1::2] = packed >> 4
+    return masks[:count].tolist()
+
+class Replay:
+    """Seed, settings and per-tick inputs of one game, plus its outcome for verification"""
+    def __init__(self, seed, settings, map_hash, inputs=None, final_score=None, final_tick=None):
+        self.seed = seed
+        self.settings = settings
+        self.map_hash = map_hash
+        self.inputs = inputs if inputs is not None else []
+        self.final_score = final_score
+        self.final_tick = final_tick
+
+    @classmethod
+    def start(cls, simulation):
+        """Begin recording the game a Simulation has just been reset to
+
+        Raises ValueError for games that can't be replayed exactly (enemy AI
+        planned on a background thread).
+        """
+        if not simulation.reproducible:
+            raise ValueError(f"ai_mode {simulation.ai_mode!r} games can't be replayed")
+        settings = {name: getattr(simulation, name) for name in SETTINGS}
+        return cls(simulation.seed, settings, simulation.game_map.content_hash())
+
+    def record(self, input_mask):
+        """Store the input mask passed to the next Simulation.step"""
+        self.inputs.append(input_mask)
+
+    def finish(self, simulation):
+        """Store the outcome, which playback checks against"""
+        self.final_score = simulation.score
+        self.final_tick = simulation.tick
+
+    def to_bytes(self):
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "seed": self.seed,
+            "settings": self.settings,
+            "map_hash": self.map_hash,
+            "ticks": len(self.inputs),
+            "final_score": self.final_score,
+            "final_tick": self.final_tick,
+        }).encode("utf-8")
+        return MAGIC + struct.pack("<I", len(header)) + header + pack_inputs(self.inputs)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        (header_size,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8:8 + header_size])
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"unsupported replay version {header['version']}")
+        inputs = unpack_inputs(data[8 + header_size:], header["ticks"])
+        return cls(header["seed"], header["settings"], header["map_hash"], inputs,
+                   header["final_score"], header["final_tick"])
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "rb") as f:
+            return cls.from_bytes(f.read())
+
+def play_replay(replay, game_map=None):
+    """Re-run a replay as fast as possible and return the finished Simulation
+
+    game_map must be the map the game was recorded on (the built-in map is
+    used when it is None); a different map raises ValueError.
+    """
+    settings = replay.settings
+    if game_map is None:
+        game_map = GameMap(1024, 768)
+    if game_map.content_hash() != replay.map_hash:
+        raise ValueError("replay was recorded on a different map")
+
+    simulation = Simulation(tick_rate=settings["tick_rate"], gem_count=settings["gem_count"],
+                            power_up_count=settings["power_up_count"], game_map=game_map,
+                            active_radius=settings["active_radius"],
+                            path_budget_ms=settings.get("path_budget_ms"),
+                            ai_mode=settings.get("ai_mode", "inline"))
+    for name in ("game_duration", "power_up_duration", "enemy_speed", "enemy_scared_speed"):
+        setattr(simulation, name, settings[name])
+    simulation.reset(replay.seed)
+
+    step = simulation.step
+    for input_mask in replay.inputs:
+        step(input_mask)
+    simulation.close()
+    return simulation
+
+def verify(replay, game_map=None):
+    """Play a replay back and check it ends with the recorded score and tick"""
+    simulation = play_replay(replay, game_map)
+    return simulation.score == replay.final_score and simulation.tick == replay.final_tick
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back a recorded game headless and verify it")
+    parser.add_argument("replay", help="replay file written by main.py --record")
+    parser.add_argument("--map", dest="map_file", help="tile map the game was recorded on")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay)
+    game_map = GameMap.from_tile_file(args.map_file) if args.map_file else None
+
+    start = time.perf_counter()
+    simulation = play_replay(replay, game_map)
+    elapsed = time.perf_counter() - start
+
+    game_seconds = simulation.elapsed_time
+    print(f"Played {len(replay.inputs)} ticks ({game_seconds:.1f}s of game) in {elapsed:.2f}s "
+          f"({game_seconds / elapsed if elapsed else float('inf'):.0f}x real time)")
+    print(f"Score {simulation.score} at tick {simulation.tick}; "
+          f"recorded {replay.final_score} at tick {replay.final_tick}")
+    if simulation.score != replay.final_score or simulation.tick != replay.final_tick:
+        print("MISMATCH: playback diverged from the recording")
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+import random
+from player import Player
+from enemy import Enemy
+from collectible import Gem, PowerUp
+from game_map import GameMap
+from navigation import NavGrid, FlowField
+from spatial_hash import SpatialHash
+from entity_pool import EntityPool
+from path_planner import PathPlanner, EnemyDirector, EXPANSIONS_PER_MS
+from ai_worker import (AIWorker, AISnapshot, PlayerState, IntentReader, AI_INLINE, AI_THREAD, AI_LOCKSTEP, AI_MODES,
+                       MAX_INTENT_AGE)
+
+# Events reported by Simulation.step so a front end can react (sounds, effects)
+EVENT_GEM = "gem"
+EVENT_POWER_UP = "power_up"
+EVENT_ENEMY_EATEN = "enemy_eaten"
+EVENT_PLAYER_CAUGHT = "player_caught"
+
+# Points per collected gem and per enemy eaten during a power-up
+GEM_POINTS = 100
+ENEMY_POINTS = 200
+
+# Entity speeds and AI intervals are tuned per tick at this rate
+BASE_TICK_RATE = 60
+
+class Simulation:
+    """Game rules without a window, sound device or wall clock
+
+    Owns the score, timers, entities and collisions. Time only moves when
+    step() is called, one tick (1 / tick_rate seconds) at a time, so the game
+    can be stepped as fast as the CPU allows. Entity speeds are rescaled so
+    the game plays at the same pace for any tick_rate.
+
+    game_map replaces the default width x height map. On large maps,
+    active_radius limits enemy updates and pathfinding to the area around
+    the player so a tick costs the same however big the map is.
+
+    All randomness comes from self.rng, seeded per game (see reset), so a
+    game is fully determined by its seed, settings and inputs.
+
+    path_budget_ms turns on per-enemy goals (ambush and patrol, see
+    path_planner.EnemyDirector) with about that many milliseconds of path
+    searching per tick. The budget is converted to A* node expansions with
+    the approximate path_planner.EXPANSIONS_PER_MS, so that it doesn't
+    depend on the clock and games still repeat.
+
+    ai_mode moves enemy planning to an ai_worker.AIWorker: "thread" runs it
+    in the background, where enemies act on intents up to MAX_INTENT_AGE
+    ticks old and fall back to their simple movement while the worker is
+    further behind, so those games are not reproducible; "lockstep" runs it in step() exactly
+    as "inline" does but through the worker.
+    """
+    def __init__(self, width=1024, height=768, tick_rate=60, gem_count=20, power_up_count=4,
+                 game_map=None, active_radius=None, seed=None, path_budget_ms=None, ai_mode=AI_INLINE):
+        if ai_mode not in AI_MODES:
+            raise ValueError(f"unknown ai_mode {ai_mode!r}")
+        self.tick_rate = tick_rate
+        self.gem_count = gem_count
+        self.power_up_count = power_up_count
+        self.active_radius = active_radius
+        self.path_budget_ms = path_budget_ms
+        self.ai_mode = ai_mode
+
+        # Optional profiler.FrameProfiler that times each phase of step()
+        self.profiler = None
+
+        # Game settings
+        self.game_duration = 120  # 2 minutes in seconds
+        self.power_up_duration = 10  # 10 seconds
+
+        # Enemy speeds in pixels per tick at BASE_TICK_RATE (None keeps Enemy's defaults)
+        self.enemy_speed = None
+        self.enemy_scared_speed = None
+
+        # Initialize game map (immutable, kept across resets)
+        self.game_map = game_map if game_map is not None else GameMap(width, height)
+
+        # Shared enemy pathfinding (NavGrid radius matches Enemy.radius); paths
+        # around walls can be about twice the straight-line distance
+        nav_grid = NavGrid(self.game_map, radius=12)
+        max_distance = None
+        if active_radius is not None:
+            max_distance = 2 * active_radius // nav_grid.tile_size
+        self.flow_field = FlowField(nav_grid, max_distance)
+        self.director = None
+        if path_budget_ms is not None:
+            max_expansions = max(1, round(path_budget_ms * EXPANSIONS_PER_MS))
+            planner = PathPlanner(nav_grid, budget_ms=path_budget_ms, max_expansions=max_expansions)
+            self.director = EnemyDirector(planner, self.flow_field)
+
+        # With a worker, the flow field and director belong to it from here on
+        self.ai_worker = None
+        self._intent_reader = IntentReader()
+        self._game = 0
+        if ai_mode != AI_INLINE:
+            self.ai_worker = AIWorker(self.flow_field, self.director, threaded=ai_mode != AI_LOCKSTEP)
+
+        # Enemies and collectibles are recycled across games instead of reallocated
+        self.pool = EntityPool()
+        self.player = None
+        self.enemies = SpatialHash()
+        self.gems = SpatialHash()
+        self.power_ups = SpatialHash()
+
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new game on the same map, re-seeding entities and timers
+
+        seed picks the game's random stream; without one a fresh seed is
+        drawn. Either way it is kept in self.seed so the game can be replayed.
+        """
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+
+        # Game state
+        self.score = 0
+        self.tick = 0
+        self.game_over = False
+        self.power_up_active = False
+        self.power_up_start_tick = 0
+        self.events = []
+
+        # Initialize player
+        start_pos = self.game_map.get_player_start_position()
+        if self.player is None:
+            self.player = Player(start_pos[0], start_pos[1])
+        else:
+            self.player.reset(start_pos[0], start_pos[1])
+        self._scale_to_tick_rate(self.player)
+
+        # Hand the last game's entities back to the pool
+        pool = self.pool
+        for entities in (self.enemies, self.gems, self.power_ups):
+            pool.release_all(entities)
+            entities.clear()
+
+        # Enemies and collectibles live in spatial indexes so collision checks
+        # only look at the grid cells around the player
+        enemy_positions = self.game_map.get_enemy_start_positions(self.rng)
+        for pos in enemy_positions:
+            enemy = pool.acquire(Enemy, pos[0], pos[1], self.rng)
+            if self.enemy_speed is not None:
+                enemy.speed = self.enemy_speed
+            if self.enemy_scared_speed is not None:
+                enemy.scared_speed = self.enemy_scared_speed
+            self._scale_to_tick_rate(enemy)
+            self.enemies.add(enemy)
+
+        self._game += 1
+        self._roster = tuple(self.enemies)
+        if self.director is not None and self.ai_worker is None:
+            self.director.reset(self.enemies)
+
+        # Initialize collectibles
+        self._spawn_collectibles()
+
+    def _scale_to_tick_rate(self, entity):
+        """Convert an entity's per-tick speeds (tuned for BASE_TICK_RATE) to this tick rate"""
+        if self.tick_rate == BASE_TICK_RATE:
+            return
+        scale = BASE_TICK_RATE / self.tick_rate
+        if isinstance(entity, Player):
+            entity.speed *= scale
+            entity.power_speed *= scale
+        else:
+            entity.speed *= scale
+            entity.scared_speed *= scale
+            entity.direction_change_interval = max(1, round(entity.direction_change_interval / scale))
+
+    @property
+    def reproducible(self):
+        """Whether the game is fully determined by its seed, settings and inputs"""
+        return self.ai_mode != AI_THREAD
+
+    @property
+    def elapsed_time(self):
+        """Simulated seconds since the game started"""
+        return self.tick / self.tick_rate
+
+    @property
+    def remaining_time(self):
+        """Simulated seconds left on the game clock"""
+        return max(0, self.game_duration - self.elapsed_time)
+
+    @property
+    def power_up_remaining(self):
+        """Simulated seconds left on the active power-up (0 when inactive)"""
+        if not self.power_up_active:
+            return 0
+        elapsed = (self.tick - self.power_up_start_tick) / self.tick_rate
+        return max(0, self.power_up_duration - elapsed)
+
+    def _spawn_collectibles(self):
+        """Spawn gems and power-ups at random valid positions"""
+        positions = self.game_map.sample_spawn_positions(self.gem_count + self.power_up_count, self.rng)
+
+        # Gems first, so they still get their share on a crowded map
+        acquire = self.pool.acquire
+        for x, y in positions[:self.gem_count]:
+            self.gems.add(acquire(Gem, x, y))
+
+        for x, y in positions[self.gem_count:]:
+            self.power_ups.add(acquire(PowerUp, x, y))
+
+    def _update_enemies_from_worker(self, active_enemies):
+        """Move enemies along the intents the AI worker last published"""
+        player = self.player
+        worker = self.ai_worker
+        worker.submit(AISnapshot(self._game, self.tick, PlayerState(player.x, player.y, player.dx, player.dy),
+                                 self.power_up_active, tuple((enemy, enemy.x, enemy.y) for enemy in active_enemies),
+                                 self._roster))
+
+        # Intents from the previous game or too many ticks ago (the worker
+        # lagging behind) are ignored, leaving enemies to their simple movement
+        published = worker.intents()
+        intents = published.intents
+        if published.game != self._game or self.tick - published.tick > MAX_INTENT_AGE:
+            intents = {}
+        reader = self._intent_reader
+        for enemy in active_enemies:
+            reader.intent = intents.get(enemy)
+            enemy.update(player.x, player.y, self.game_map, self.power_up_active, reader)
+            self.enemies.move(enemy)
+        reader.intent = None
+
+    def close(self):
+        """Stop the AI worker thread, if there is one"""
+        if self.ai_worker is not None:
+            self.ai_worker.close()
+
+    def _end_game(self):
+        """Stop the game and any running power-up"""
+        self.game_over = True
+        self.power_up_active = False
+
+    def step(self, input_mask):
+        """Advance the game by one tick and return the events that happened
+
+        input_mask is a combination of the INPUT_* bits from player.py.
+        """
+        self.events = []
+        if self.game_over:
+            return self.events
+
+        # Check if game time is up
+        if self.elapsed_time >= self.game_duration:
+            self._end_game()
+            return self.events
+
+        # Check if all collectibles are collected
+        if not self.gems and not self.power_ups:
+            self._end_game()
+            return self.events
+
+        # Handle power-up timer
+        if self.power_up_active and self.power_up_remaining <= 0:
+            self.power_up_active = False
+
+        profiler = self.profiler
+
+        # Update player
+        player = self.player
+        player.update(input_mask, self.game_map, self.power_up_active)
+        if profiler is not None:
+            profiler.lap("player")
+
+        # Update enemies (only those near the player when active_radius is set)
+        if self.active_radius is None:
+            active_enemies = self.enemies
+        else:
+            active_enemies = self.enemies.nearby(player.x, player.y, self.active_radius)
+        if self.ai_worker is None:
+            self.flow_field.update(player.x, player.y)
+            director = self.director
+            if director is not None:
+                director.begin_tick(player)
+            for enemy in active_enemies:
+                navigator = self.flow_field if director is None else director.navigator(enemy)
+                enemy.update(player.x, player.y, self.game_map, self.power_up_active, navigator)
+                self.enemies.move(enemy)
+        else:
+            self._update_enemies_from_worker(active_enemies)
+        if profiler is not None:
+            profiler.lap("enemy_ai")
+
+        # Check collisions with gems
+        for gem in self.gems.colliding(player.x, player.y, player.radius):
+            self.gems.remove(gem)
+            self.pool.release(gem)
+            self.score += GEM_POINTS
+            self.events.append(EVENT_GEM)
+
+        # Check collisions with power-ups
+        for power_up in self.power_ups.colliding(player.x, player.y, player.radius):
+            self.power_ups.remove(power_up)
+            self.pool.release(power_up)
+            self.power_up_active = True
+            self.power_up_start_tick = self.tick
+            self.events.append(EVENT_POWER_UP)
+
+        # Check collisions with enemies
+        for enemy in self.enemies.colliding(player.x, player.y, player.radius):
+            if self.power_up_active:
+                # Player destroys enemy
+                self.enemies.remove(enemy)
+                self.pool.release(enemy)
+                self.score += ENEMY_POINTS
+                self.events.append(EVENT_ENEMY_EATEN)
+            else:
+                # Enemy destroys player
+                self._end_game()
+                self.events.append(EVENT_PLAYER_CAUGHT)
+        if profiler is not None:
+            profiler.lap("collisions")
+
+        self.tick += 1
+        return self.events
@@ -1,20 +1,45 @@
 import pygame
 import os
+import glob
+import hashlib
+from voice_pool import VoicePool, RETRIGGER
+
+# Bump this whenever the synthesis code changes so cached waveforms are rebuilt
+SYNTH_VERSION = 1
+
+# Background music streams on this reserved mixer channel in chunks of this length
+MUSIC_CHANNEL = 0
+MUSIC_CHUNK_SECONDS = 0.25
+
+# Sound effects share this many channels after the music channel, with at
+# most this many overlapping copies of each sound
+EFFECT_CHANNELS = 6
+GEM_VOICES = 3
+POWERUP_VOICES = 1
 
 class SoundManager:
-    def __init__(self):
+    def __init__(self, sounds_dir="sounds"):
         pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
         
-        # Create sounds directory
-        self.sounds_dir = "sounds"
+        # Create sounds directory (also the cache for generated waveforms)
+        self.sounds_dir = sounds_dir
         if not os.path.exists(self.sounds_dir):
             os.makedirs(self.sounds_dir)
         
-        # Create simple sound effects
+        # Create simple sound effects, then drop cached waveforms they didn't use
+        self._cache_files = {}  # kind -> filenames of the cache entries in use
         self._create_simple_sounds()
+        self._prune_sound_cache()
+        
+        # Fixed mixer channels: music, then the effect voices
+        pygame.mixer.set_num_channels(MUSIC_CHANNEL + 1 + EFFECT_CHANNELS)
+        self.voices = VoicePool(range(MUSIC_CHANNEL + 1, MUSIC_CHANNEL + 1 + EFFECT_CHANNELS))
+        self.voices.register("gem", self.gem_sound, GEM_VOICES, RETRIGGER)
+        self.voices.register("powerup", self.powerup_sound, POWERUP_VOICES, RETRIGGER)
         
         # Music state
         self.music_playing = False
+        self.music_channel = None
         self.powerup_channel = None
     
     def _create_simple_sounds(self):
@@ -42,189 +67,190 @@ class SoundManager:
     
     def _create_tone_sound(self, frequency, duration, volume):
         """Create a simple tone sound"""
-        try:
-            import pygame.sndarray as sndarray
-            import numpy as np
-            
-            sample_rate = 22050
-            frames = int(duration * sample_rate)
-            
-            # Create time array
-            t = np.linspace(0, duration, frames)
-            
-            # Generate sine wave
-            wave = np.sin(2 * np.pi * frequency * t)
-            
-            # Apply envelope (fade out)
-            envelope = np.exp(-t * 3)
-            wave = wave * envelope * volume
-            
-            # Convert to stereo and ensure C-contiguous
-            stereo_wave = np.zeros((frames, 2), dtype=np.float64)
-            stereo_wave[:, 0] = wave  # Left channel
-            stereo_wave[:, 1] = wave  # Right channel
-            
-            # Convert to int16 and make C-contiguous
-            sound_array = (stereo_wave * 32767).astype(np.int16)
-            sound_array = np.ascontiguousarray(sound_array)
-            
-            # Create pygame sound
-            sound = sndarray.make_sound(sound_array)
-            return sound
-            
-        except ImportError:
-            # If numpy/sndarray not available, return None
-            return None
-        except Exception as e:
-            print(f"Error creating tone sound: {e}")
-            return None
+        return self._load_or_synthesize("tone", (frequency, duration, volume), self._tone_samples)
     
     def _create_sweep_sound(self, start_freq, end_freq, duration, volume):
         """Create a frequency sweep sound"""
+        return self._load_or_synthesize("sweep", (start_freq, end_freq, duration, volume), self._sweep_samples)
+    
+    def _load_or_synthesize(self, kind, params, synthesize):
+        """Load a waveform from the sounds/ cache, synthesizing and saving it on a miss
+        
+        Cache files are named after SYNTH_VERSION and a hash of the synthesis
+        parameters and mixer format, so every sound gets its own file. Files
+        no sound of this SoundManager uses are deleted afterwards (see
+        _prune_sound_cache).
+        """
         try:
             import pygame.sndarray as sndarray
-            import numpy as np
-            
-            sample_rate = 22050
-            frames = int(duration * sample_rate)
-            
-            # Create time array
-            t = np.linspace(0, duration, frames)
-            
-            # Create frequency sweep
-            frequency = start_freq + (end_freq - start_freq) * (t / duration)
-            
-            # Generate the sweep
-            wave = np.sin(2 * np.pi * frequency * t)
             
-            # Apply envelope
-            envelope = np.exp(-t * 2)
-            wave = wave * envelope * volume
+            key_source = repr((kind, params, pygame.mixer.get_init(), SYNTH_VERSION))
+            key = hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+            filename = os.path.join(self.sounds_dir, f"{kind}_v{SYNTH_VERSION}_{key}.npy")
             
-            # Convert to stereo and ensure C-contiguous
-            stereo_wave = np.zeros((frames, 2), dtype=np.float64)
-            stereo_wave[:, 0] = wave  # Left channel
-            stereo_wave[:, 1] = wave  # Right channel
-            
-            # Convert to int16 and make C-contiguous
-            sound_array = (stereo_wave * 32767).astype(np.int16)
-            sound_array = np.ascontiguousarray(sound_array)
+            sound_array = self._load_sound_from_file(filename)
+            if sound_array is None:
+                sound_array = synthesize(*params)
+                self._save_sound_to_file(sound_array, filename)
+            self._cache_files.setdefault(kind, set()).add(os.path.basename(filename))
             
             # Create pygame sound
-            sound = sndarray.make_sound(sound_array)
-            return sound
+            return sndarray.make_sound(sound_array)
             
         except ImportError:
+            # If numpy/sndarray not available, return None
             return None
         except Exception as e:
-            print(f"Error creating sweep sound: {e}")
+            print(f"Error creating {kind} sound: {e}")
             return None
     
+    def _tone_samples(self, frequency, duration, volume):
+        """Synthesize a simple tone as an int16 stereo array"""
+        import numpy as np
+        
+        sample_rate = 22050
+        frames = int(duration * sample_rate)
+        
+        # Create time array
+        t = np.linspace(0, duration, frames)
+        
+        # Generate sine wave
+        wave = np.sin(2 * np.pi * frequency * t)
+        
+        # Apply envelope (fade out)
+        envelope = np.exp(-t * 3)
+        wave = wave * envelope * volume
+        
+        return self._to_stereo_int16(wave, 32767)
+    
+    def _sweep_samples(self, start_freq, end_freq, duration, volume):
+        """Synthesize a frequency sweep as an int16 stereo array"""
+        import numpy as np
+        
+        sample_rate = 22050
+        frames = int(duration * sample_rate)
+        
+        # Create time array
+        t = np.linspace(0, duration, frames)
+        
+        # Create frequency sweep
+        frequency = start_freq + (end_freq - start_freq) * (t / duration)
+        
+        # Generate the sweep
+        wave = np.sin(2 * np.pi * frequency * t)
+        
+        # Apply envelope
+        envelope = np.exp(-t * 2)
+        wave = wave * envelope * volume
+        
+        return self._to_stereo_int16(wave, 32767)
+    
+    def _to_stereo_int16(self, wave, scale):
+        """Duplicate a mono wave into a C-contiguous int16 stereo array"""
+        import numpy as np
+        
+        stereo_wave = np.zeros((len(wave), 2), dtype=np.float64)
+        stereo_wave[:, 0] = wave  # Left channel
+        stereo_wave[:, 1] = wave  # Right channel
+        
+        sound_array = (stereo_wave * scale).astype(np.int16)
+        return np.ascontiguousarray(sound_array)
+    
     def play_gem_sound(self):
-        """Play gem collection sound"""
-        if self.gem_sound:
-            self.gem_sound.play()
-        else:
-            # Fallback - could add a simple beep here
-            pass
+        """Play gem collection sound (restarts the oldest copy when GEM_VOICES are playing)"""
+        self.voices.play("gem")
     
     def play_powerup_sound(self):
-        """Play power-up sound"""
-        if self.powerup_sound:
-            self.powerup_channel = self.powerup_sound.play()
-        else:
-            # Fallback
-            pass
+        """Play power-up sound (restarts it if it is already playing)"""
+        self.powerup_channel = self.voices.play("powerup")
     
     def start_background_music(self):
-        """Start playing background music"""
-        try:
-            # For now, we'll skip background music file creation to avoid complexity
-            # The sound effects (gem and power-up) are working well
-            print("Background music disabled for simplicity - sound effects active!")
-            self.music_playing = False
-        except Exception as e:
-            print(f"Error starting background music: {e}")
-    
-    def _create_background_music(self):
-        """Create simple background music"""
+        """Start streaming background music on a reserved mixer channel"""
         try:
             import pygame.sndarray as sndarray
-            import numpy as np
-            
-            sample_rate = 22050
-            duration = 8.0  # 8-second loop
-            frames = int(duration * sample_rate)
-            
-            # Simple melody notes (C major scale)
-            notes = [261.63, 293.66, 329.63, 349.23, 392.00, 440.00, 493.88, 523.25]  # C4 to C5
-            note_duration = duration / len(notes)
-            
-            music = np.zeros(frames)
-            
-            for i, freq in enumerate(notes):
-                start_idx = int(i * note_duration * sample_rate)
-                end_idx = int((i + 1) * note_duration * sample_rate)
-                note_frames = end_idx - start_idx
-                
-                if note_frames > 0:
-                    t = np.linspace(0, note_duration, note_frames)
-                    
-                    # Generate note with harmonics
-                    note = (np.sin(2 * np.pi * freq * t) * 0.4 +
-                           np.sin(2 * np.pi * freq * 2 * t) * 0.2)
-                    
-                    # Apply note envelope
-                    envelope = np.exp(-t * 1.5)
-                    note = note * envelope
-                    
-                    music[start_idx:end_idx] = note
-            
-            # Convert to stereo and ensure C-contiguous
-            stereo_music = np.zeros((frames, 2), dtype=np.float64)
-            stereo_music[:, 0] = music  # Left channel
-            stereo_music[:, 1] = music  # Right channel
+            from music_stream import MusicStream
             
-            # Convert to int16 and make C-contiguous
-            music_array = (stereo_music * 16383).astype(np.int16)
-            music_array = np.ascontiguousarray(music_array)
-            
-            # Create pygame sound
-            background_sound = sndarray.make_sound(music_array)
-            return background_sound
+            frequency, _, channels = pygame.mixer.get_init()
+            self._make_sound = sndarray.make_sound
+            self._music_chunks = MusicStream(frequency, channels).chunks(int(MUSIC_CHUNK_SECONDS * frequency))
             
+            # Keep sound effects off the music channel
+            pygame.mixer.set_reserved(MUSIC_CHANNEL + 1)
+            self.music_channel = pygame.mixer.Channel(MUSIC_CHANNEL)
+            self.music_channel.play(self._next_music_chunk())
+            self.music_channel.queue(self._next_music_chunk())
+            self.music_playing = True
         except ImportError:
             print("NumPy not available, skipping background music")
-            return None
+            self.music_playing = False
         except Exception as e:
-            print(f"Error creating background music: {e}")
-            return None
+            print(f"Error starting background music: {e}")
+            self.music_playing = False
+    
+    def _next_music_chunk(self):
+        """Synthesise the next stretch of music as a Sound"""
+        return self._make_sound(next(self._music_chunks))
+    
+    def update_music(self):
+        """Keep one music chunk queued behind the playing one (call once per frame)
+        
+        The channel holds the playing chunk plus one queued chunk, so up to
+        MUSIC_CHUNK_SECONDS can pass between calls without a gap.
+        """
+        if self.music_playing and self.music_channel.get_queue() is None:
+            self.music_channel.queue(self._next_music_chunk())
     
-    def _save_sound_to_file(self, sound, filename):
-        """Save a pygame sound to a WAV file"""
+    def _save_sound_to_file(self, sound_array, filename):
+        """Save a waveform array to the sound cache"""
         try:
-            # This is a simplified approach - in practice you might use
-            # pygame.sndarray.array() and save it properly
-            # For now, we'll just use the sound object directly
-            pass
+            import numpy as np
+            
+            # Write to a temporary file first so a crash never leaves a half-written entry
+            # (per process, so processes starting together don't clobber each other's file)
+            temp_filename = f"{filename}.{os.getpid()}.tmp"
+            with open(temp_filename, "wb") as f:
+                np.save(f, sound_array)
+            os.replace(temp_filename, filename)
         except Exception as e:
             print(f"Error saving sound to file: {e}")
     
-    def _play_simple_background_music(self):
-        """Play simple background music using generated tones"""
+    def _load_sound_from_file(self, filename):
+        """Memory-map a cached waveform array, or return None if it is missing or unreadable"""
+        if not os.path.exists(filename):
+            return None
         try:
-            # For now, we'll skip background music to keep the implementation simple
-            # You can add music files later
-            self.music_playing = False
+            import numpy as np
+            
+            sound_array = np.load(filename, mmap_mode="r")
+            if sound_array.dtype != np.int16 or sound_array.ndim != 2 or sound_array.shape[1] != 2:
+                return None
+            return sound_array
         except Exception as e:
-            print(f"Error with background music: {e}")
+            print(f"Error loading cached sound {filename}: {e}")
+            return None
+    
+    def _prune_sound_cache(self):
+        """Delete cached waveforms of the kinds in use that no current sound needs
+        
+        That covers files from other synthesis versions and from parameters
+        or mixer formats that are no longer used, so the cache doesn't grow.
+        """
+        for kind, in_use in self._cache_files.items():
+            for filename in glob.glob(os.path.join(self.sounds_dir, f"{kind}_*.npy")):
+                if os.path.basename(filename) in in_use:
+                    continue
+                try:
+                    os.remove(filename)
+                except OSError:
+                    pass
     
     def stop_background_music(self):
         """Stop background music"""
         if self.music_playing:
-            pygame.mixer.music.stop()
+            self.music_channel.stop()
             self.music_playing = False
     
     def set_music_volume(self, volume):
         """Set background music volume (0.0 to 1.0)"""
-        pygame.mixer.music.set_volume(volume)
+        if self.music_channel is not None:
+            self.music_channel.set_volume(volume)
@@ -0,0 +1,96 @@
+class SpatialHash:
+    """Uniform-grid index of entities that have x, y and radius attributes
+
+    Behaves like an ordered collection (iteration follows insertion order)
+    with O(1) add, remove and move, and answers "what is near this point"
+    by visiting only the grid cells around it.
+    """
+    def __init__(self, cell_size=64, entities=()):
+        self.cell_size = cell_size
+        self._cells = {}  # (cell_x, cell_y) -> {entity: None}
+        self._entity_cells = {}  # entity -> (cell_x, cell_y), in insertion order
+        self.max_radius = 0
+        for entity in entities:
+            self.add(entity)
+
+    def _cell_of(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def add(self, entity):
+        """Index an entity at its current position"""
+        cell = self._cell_of(entity.x, entity.y)
+        self._cells.setdefault(cell, {})[entity] = None
+        self._entity_cells[entity] = cell
+        if entity.radius > self.max_radius:
+            self.max_radius = entity.radius
+
+    def remove(self, entity):
+        """Remove an entity from the index"""
+        cell = self._entity_cells.pop(entity)
+        bucket = self._cells[cell]
+        del bucket[entity]
+        if not bucket:
+            del self._cells[cell]
+
+    def move(self, entity):
+        """Update the index after an entity's x/y changed"""
+        cell = self._cell_of(entity.x, entity.y)
+        old_cell = self._entity_cells[entity]
+        if cell == old_cell:
+            return
+
+        bucket = self._cells[old_cell]
+        del bucket[entity]
+        if not bucket:
+            del self._cells[old_cell]
+        self._cells.setdefault(cell, {})[entity] = None
+        self._entity_cells[entity] = cell
+
+    def clear(self):
+        self._cells.clear()
+        self._entity_cells.clear()
+        self.max_radius = 0
+
+    def __iter__(self):
+        return iter(self._entity_cells)
+
+    def __len__(self):
+        return len(self._entity_cells)
+
+    def __contains__(self, entity):
+        return entity in self._entity_cells
+
+    def nearby(self, x, y, radius):
+        """Entities in the cells that a circle at (x, y) could overlap"""
+        reach = radius + self.max_radius
+        return self._in_cells(x - reach, y - reach, x + reach, y + reach)
+
+    def in_rect(self, rect):
+        """Entities in the cells that could overlap a Rect (such as the camera view)"""
+        reach = self.max_radius
+        return self._in_cells(rect.left - reach, rect.top - reach, rect.right + reach, rect.bottom + reach)
+
+    def _in_cells(self, left, top, right, bottom):
+        """Entities in every cell touching the box from (left, top) to (right, bottom)"""
+        min_x, min_y = self._cell_of(left, top)
+        max_x, max_y = self._cell_of(right, bottom)
+
+        cells = self._cells
+        found = []
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def colliding(self, x, y, radius):
+        """Entities whose circle overlaps a circle at (x, y), using squared distances"""
+        hits = []
+        for entity in self.nearby(x, y, radius):
+            dx = entity.x - x
+            dy = entity.y - y
+            reach = entity.radius + radius
+            if dx * dx + dy * dy < reach * reach:
+                hits.append(entity)
+        return hits
@@ -0,0 +1,50 @@
+import pygame
+
+class SpriteAtlas:
+    """One animation cycle of a sprite, pre-rendered frame by frame
+
+    The frames are sampled once from a render function, so drawing an
+    animated item is a single blit of frames[index] instead of redoing its
+    trig and shape drawing every frame.
+    """
+    def __init__(self, render_frame, extent, period, frame_count):
+        """render_frame(surface, center, animation_time) draws one frame;
+        extent is the largest distance drawn from the centre in pixels."""
+        self.extent = extent
+        self.frames = []
+
+        size = extent * 2 + 1
+        for index in range(frame_count):
+            frame = pygame.Surface((size, size), pygame.SRCALPHA)
+            render_frame(frame, (extent, extent), period * index / frame_count)
+            # Match the display's pixel format for fast blits when there is one
+            if pygame.display.get_surface() is not None:
+                frame = frame.convert_alpha()
+            self.frames.append(frame)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def blit_item(self, frame_index, x, y):
+        """(surface, position) pair for Surface.blits, centred on (x, y)"""
+        return (self.frames[frame_index], (int(x) - self.extent, int(y) - self.extent))
+
+# One atlas per collectible type, shared by every instance
+_atlases = {}
+
+def get_atlas(sprite_type, radius, color):
+    """Return the shared atlas for a collectible class at a given size and colour"""
+    key = (sprite_type, radius, color)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        def render_frame(surface, center, animation_time):
+            sprite_type.render_frame(surface, center, animation_time, radius, color)
+
+        atlas = SpriteAtlas(render_frame, sprite_type.animation_extent(radius),
+                            sprite_type.ANIMATION_PERIOD, sprite_type.animation_frame_count())
+        _atlases[key] = atlas
+    return atlas
+
+def clear_atlases():
+    """Drop all atlases (e.g. after the display mode changes)"""
+    _atlases.clear()
@@ -0,0 +1,46 @@
+"""Enemy AI planned through the worker in lockstep mode must give exactly the games planned inline"""
+import pytest
+
+from ai_worker import AI_INLINE, AI_LOCKSTEP
+from bots import make_bot
+from game_map import GameMap
+from simulation import Simulation, EVENT_POWER_UP
+
+# Seeds whose greedy-bot games last long enough to pick up a power-up, so
+# the flee field is planned as well as the chase field
+SEEDS = (2, 3)
+
+@pytest.fixture(scope="module")
+def game_map():
+    return GameMap(1024, 768)
+
+def play(game_map, seed, ai_mode, path_budget_ms=None):
+    """Play one greedy-bot game: (score, tick, power-ups taken, every enemy position each tick)"""
+    simulation = Simulation(game_map=game_map, seed=seed, path_budget_ms=path_budget_ms, ai_mode=ai_mode)
+    bot = make_bot("greedy", game_map)
+    bot.reset(seed)
+    power_ups = 0
+    positions = []
+    try:
+        while not simulation.game_over:
+            power_ups += simulation.step(bot(simulation)).count(EVENT_POWER_UP)
+            positions.append(tuple((enemy.x, enemy.y) for enemy in simulation.enemies))
+    finally:
+        simulation.close()
+    return simulation.score, simulation.tick, power_ups, positions
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_lockstep_matches_inline(game_map, seed):
+    lockstep = play(game_map, seed, AI_LOCKSTEP)
+    assert lockstep[2] > 0
+    assert lockstep == play(game_map, seed, AI_INLINE)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_lockstep_with_path_budget_repeats(game_map, seed):
+    first = play(game_map, seed, AI_LOCKSTEP, path_budget_ms=1)
+    assert first[2] > 0
+    assert first == play(game_map, seed, AI_LOCKSTEP, path_budget_ms=1)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_path_budget_lockstep_matches_inline(game_map, seed):
+    assert play(game_map, seed, AI_LOCKSTEP, path_budget_ms=1) == play(game_map, seed, AI_INLINE, path_budget_ms=1)
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color)
+
+    Font.render is only called when a string is seen for the first time (or
+    again after being evicted), so HUD text that rarely changes is rasterised
+    once instead of every frame.
+    """
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        """Return a surface for the text, rendering it only on a cache miss"""
+        key = (font, text, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            # Evict the least recently used entry
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def __len__(self):
+        return len(self._surfaces)
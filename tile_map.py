@@ -0,0 +1,120 @@
+import pygame
+
+# Tile characters in a map file
+WALL = "#"
+OPEN = "."
+PLAYER_START = "P"
+ENEMY_START = "E"
+TILE_CHARACTERS = (WALL, OPEN, PLAYER_START, ENEMY_START)
+
+DEFAULT_TILE_SIZE = 32
+
+class TileMap:
+    """A maze described as a grid of tiles, loaded from a text file
+
+    File format: optional "key value" settings (only tile_size for now),
+    then one line per row of tiles. Lines starting with ';' are comments.
+
+        ; A small room
+        tile_size 32
+        ##########
+        #P.....E.#
+        ##########
+
+    '#' is a wall, '.' is open floor, 'P' marks the player start and each
+    'E' an enemy start (both on open floor). All rows must be the same length.
+    """
+    def __init__(self, rows, tile_size=DEFAULT_TILE_SIZE):
+        if not rows:
+            raise ValueError("tile map has no rows")
+        if any(len(row) != len(rows[0]) for row in rows):
+            raise ValueError("tile map rows must all be the same length")
+
+        self.rows = rows
+        self.tile_size = tile_size
+        self.cols = len(rows[0])
+        self.width = self.cols * tile_size
+        self.height = len(rows) * tile_size
+
+        # Start markers in pixels (tile centres)
+        self.player_start = None
+        self.enemy_starts = []
+        for row_index, row in enumerate(rows):
+            for col, tile in enumerate(row):
+                if tile == PLAYER_START:
+                    self.player_start = self.tile_center(col, row_index)
+                elif tile == ENEMY_START:
+                    self.enemy_starts.append(self.tile_center(col, row_index))
+
+    @classmethod
+    def parse(cls, text):
+        """Build a TileMap from the contents of a map file"""
+        tile_size = DEFAULT_TILE_SIZE
+        rows = []
+        for line_number, line in enumerate(text.splitlines(), 1):
+            line = line.rstrip()
+            if not line or line.startswith(";"):
+                continue
+
+            if not rows and line[0] not in TILE_CHARACTERS:
+                # Settings come before the first row of tiles
+                key, _, value = line.partition(" ")
+                if key != "tile_size":
+                    raise ValueError(f"line {line_number}: unknown setting {key!r}")
+                tile_size = int(value)
+                continue
+
+            for tile in line:
+                if tile not in TILE_CHARACTERS:
+                    raise ValueError(f"line {line_number}: unknown tile {tile!r}")
+            rows.append(line)
+        return cls(rows, tile_size)
+
+    @classmethod
+    def load(cls, path):
+        """Read a map file"""
+        with open(path) as f:
+            return cls.parse(f.read())
+
+    def tile_center(self, col, row):
+        """Pixel centre of a tile"""
+        half = self.tile_size // 2
+        return (col * self.tile_size + half, row * self.tile_size + half)
+
+    def wall_rects(self):
+        """Wall tiles merged into as few pygame.Rects as a row-by-row sweep finds
+
+        Each row's runs of wall tiles are joined horizontally, then a run that
+        spans the same columns as one in the row above extends it downward.
+        """
+        size = self.tile_size
+        rects = []
+        open_runs = {}  # (first_col, end_col) -> [first_row, row_count]
+        for row_index, row in enumerate(self.rows):
+            runs = []
+            col = 0
+            while col < self.cols:
+                if row[col] != WALL:
+                    col += 1
+                    continue
+                start = col
+                while col < self.cols and row[col] == WALL:
+                    col += 1
+                runs.append((start, col))
+
+            next_runs = {}
+            for run in runs:
+                extended = open_runs.pop(run, None)
+                if extended is None:
+                    extended = [row_index, 0]
+                extended[1] += 1
+                next_runs[run] = extended
+
+            # Runs that didn't continue into this row are finished
+            for (start, end), (first_row, row_count) in open_runs.items():
+                rects.append(pygame.Rect(start * size, first_row * size, (end - start) * size, row_count * size))
+            open_runs = next_runs
+
+        for (start, end), (first_row, row_count) in open_runs.items():
+            rects.append(pygame.Rect(start * size, first_row * size, (end - start) * size, row_count * size))
+        return rects
@@ -0,0 +1,249 @@
+import numpy as np
+from game_map import GameMap
+from player import Player, INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN
+from collectible import Gem, PowerUp
+from enemy_swarm import EnemySwarm
+from simulation import BASE_TICK_RATE, GEM_POINTS, ENEMY_POINTS
+
+def _input_moves():
+    """(16, 2) movement direction for every input mask, with Player.update's priorities"""
+    moves = np.zeros((16, 2), dtype=np.float64)
+    for input_mask in range(16):
+        if input_mask & INPUT_LEFT:
+            moves[input_mask] = (-1, 0)
+        elif input_mask & INPUT_RIGHT:
+            moves[input_mask] = (1, 0)
+        elif input_mask & INPUT_UP:
+            moves[input_mask] = (0, -1)
+        elif input_mask & INPUT_DOWN:
+            moves[input_mask] = (0, 1)
+    return moves
+
+_INPUT_MOVES = _input_moves()
+
+class VectorEnv:
+    """num_envs independent games stepped together for training agents
+
+    Each game follows Simulation's rules (movement, power-up timer, scoring,
+    game over) with all per-game state held in NumPy arrays, so step() has
+    no per-game Python loop. Actions are the same input masks Simulation.step
+    takes (INPUT_* bits from player.py). Games that finish are restarted
+    automatically inside step().
+
+    Enemies use the direct chase / timed flee AI of EnemySwarm rather than
+    the flow-field pathfinding, which needs a search per game.
+    """
+    def __init__(self, num_envs, game_map=None, tick_rate=60, gem_count=20, power_up_count=4, seed=None):
+        self.num_envs = num_envs
+        self.game_map = game_map if game_map is not None else GameMap(1024, 768)
+        self.tick_rate = tick_rate
+        self.rng = np.random.default_rng(seed)
+
+        # Game settings, as in Simulation
+        self.game_duration = 120
+        self.power_up_duration = 10
+
+        # Entity sizes and per-tick speeds come from the game classes
+        scale = BASE_TICK_RATE / tick_rate
+        player = Player(0, 0)
+        self.player_radius = player.radius
+        self.player_speed = player.speed * scale
+        self.player_power_speed = player.power_speed * scale
+        self.gem_radius = Gem(0, 0).radius
+        self.power_up_radius = PowerUp(0, 0).radius
+        self.player_start = self.game_map.get_player_start_position()
+
+        # Collectible spots, drawn without replacement per game (gems first)
+        self.spawn_points = np.asarray(self.game_map.get_spawn_points(), dtype=np.float64)
+        spawn_count = min(gem_count + power_up_count, len(self.spawn_points))
+        self.gem_count = min(gem_count, spawn_count)
+        self.power_up_count = spawn_count - self.gem_count
+
+        # Possible start positions for each enemy
+        self._enemy_starts = self._enemy_start_candidates()
+        self.enemy_count = len(self._enemy_starts)
+
+        # Enemies of every game in one swarm: game i owns slots i*E .. i*E+E-1
+        self.enemies = EnemySwarm(capacity=num_envs * self.enemy_count, rng=self.rng)
+        for _ in range(num_envs * self.enemy_count):
+            self.enemies.add(0, 0)
+        self.enemies.speed[:] *= scale
+        self.enemies.scared_speed[:] *= scale
+        self.enemies.direction_change_interval[:] = max(1, round(self.enemies.default_direction_change_interval / scale))
+
+        # Per-game state
+        n = num_envs
+        self.player_x = np.zeros(n)
+        self.player_y = np.zeros(n)
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.power_up_active = np.zeros(n, dtype=bool)
+        self.power_up_start_tick = np.zeros(n, dtype=np.int64)
+        self.gem_x = np.zeros((n, self.gem_count))
+        self.gem_y = np.zeros((n, self.gem_count))
+        self.gem_alive = np.zeros((n, self.gem_count), dtype=bool)
+        self.power_up_x = np.zeros((n, self.power_up_count))
+        self.power_up_y = np.zeros((n, self.power_up_count))
+        self.power_up_alive = np.zeros((n, self.power_up_count), dtype=bool)
+        self.enemy_alive = np.zeros((n, self.enemy_count), dtype=bool)
+
+        # Score of each game's last finished episode
+        self.final_scores = np.zeros(n, dtype=np.int64)
+
+        # Observation layout: player x, y, power-up time left, game time left,
+        # then (dx, dy, present) for every enemy, gem and power-up
+        self.observation_size = 4 + 3 * (self.enemy_count + self.gem_count + self.power_up_count)
+        self._observations = np.zeros((n, self.observation_size), dtype=np.float32)
+
+        self._reset_envs(np.arange(n))
+
+    def _enemy_start_candidates(self):
+        """For each enemy, an (m, 2) array of the start positions GameMap may pick
+
+        Like GameMap.get_enemy_start_positions: a fixed start from the tile
+        map, or any valid integer position in the enemy's start area. (The
+        built-in areas are far enough apart that its spacing rule never
+        rejects a position.)
+        """
+        game_map = self.game_map
+        if game_map.enemy_starts:
+            return [np.array([start], dtype=np.float64) for start in game_map.enemy_starts]
+
+        candidates = []
+        for index, (min_x, min_y, max_x, max_y) in enumerate(game_map.enemy_start_areas()):
+            grid_x, grid_y = np.meshgrid(np.arange(min_x, max_x + 1), np.arange(min_y, max_y + 1))
+            valid = game_map.are_valid_positions(grid_x, grid_y, 20)
+            if valid.any():
+                candidates.append(np.column_stack((grid_x[valid], grid_y[valid])).astype(np.float64))
+            else:
+                candidates.append(np.array([game_map.enemy_fallback_position(index)], dtype=np.float64))
+        return candidates
+
+    def reset(self, seed=None):
+        """Restart every game and return the observations"""
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+            self.enemies.rng = self.rng
+        self._reset_envs(np.arange(self.num_envs))
+        return self._observe()
+
+    def _reset_envs(self, envs):
+        """Start new games in the given envs (an index array)"""
+        count = len(envs)
+        self.player_x[envs] = self.player_start[0]
+        self.player_y[envs] = self.player_start[1]
+        self.tick[envs] = 0
+        self.score[envs] = 0
+        self.power_up_active[envs] = False
+
+        # Distinct spawn points per game: the first columns of a random permutation
+        order = np.argsort(self.rng.random((count, len(self.spawn_points))), axis=1)
+        points = self.spawn_points[order[:, :self.gem_count + self.power_up_count]]
+        self.gem_x[envs] = points[:, :self.gem_count, 0]
+        self.gem_y[envs] = points[:, :self.gem_count, 1]
+        self.gem_alive[envs] = True
+        self.power_up_x[envs] = points[:, self.gem_count:, 0]
+        self.power_up_y[envs] = points[:, self.gem_count:, 1]
+        self.power_up_alive[envs] = True
+
+        for enemy, candidates in enumerate(self._enemy_starts):
+            starts = candidates[self.rng.integers(len(candidates), size=count)]
+            self.enemies.place(envs * self.enemy_count + enemy, starts[:, 0], starts[:, 1])
+        self.enemy_alive[envs] = True
+
+    def step(self, actions):
+        """Advance every game one tick
+
+        actions holds one input mask per game. Returns (observations,
+        rewards, dones): rewards are the points scored this tick, and a game
+        that is done has already been restarted (its final score is in
+        final_scores). The observation array is reused between calls.
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        player_x, player_y = self.player_x, self.player_y
+        power = self.power_up_active
+        game_map = self.game_map
+
+        # Handle power-up timer
+        expired = power & ((self.tick - self.power_up_start_tick) / self.tick_rate >= self.power_up_duration)
+        power &= ~expired
+
+        # Update players
+        move = _INPUT_MOVES[actions & 15]
+        speed = np.where(power, self.player_power_speed, self.player_speed)
+        new_x = player_x + move[:, 0] * speed
+        new_y = player_y + move[:, 1] * speed
+        valid = game_map.are_valid_positions(new_x, new_y, self.player_radius)
+        player_x[valid] = new_x[valid]
+        player_y[valid] = new_y[valid]
+
+        # Update enemies
+        enemy_count = self.enemy_count
+        self.enemies.update(np.repeat(player_x, enemy_count), np.repeat(player_y, enemy_count),
+                            game_map, np.repeat(power, enemy_count))
+
+        # Check collisions with gems
+        reach = self.player_radius + self.gem_radius
+        hit = self.gem_alive & (((self.gem_x - player_x[:, None]) ** 2 +
+                                 (self.gem_y - player_y[:, None]) ** 2) < reach * reach)
+        self.gem_alive &= ~hit
+        rewards = hit.sum(axis=1) * GEM_POINTS
+
+        # Check collisions with power-ups
+        reach = self.player_radius + self.power_up_radius
+        hit = self.power_up_alive & (((self.power_up_x - player_x[:, None]) ** 2 +
+                                      (self.power_up_y - player_y[:, None]) ** 2) < reach * reach)
+        self.power_up_alive &= ~hit
+        collected = hit.any(axis=1)
+        power |= collected
+        self.power_up_start_tick[collected] = self.tick[collected]
+
+        # Check collisions with enemies
+        enemy_x = self.enemies.x.reshape(self.num_envs, enemy_count)
+        enemy_y = self.enemies.y.reshape(self.num_envs, enemy_count)
+        reach = self.player_radius + self.enemies.radius
+        touching = self.enemy_alive & (((enemy_x - player_x[:, None]) ** 2 +
+                                        (enemy_y - player_y[:, None]) ** 2) < reach * reach)
+        eaten = touching & power[:, None]
+        self.enemy_alive &= ~eaten
+        rewards += eaten.sum(axis=1) * ENEMY_POINTS
+        caught = (touching & ~power[:, None]).any(axis=1)
+
+        self.score += rewards
+        self.tick += 1
+
+        # Game over: caught, out of time or nothing left to collect
+        dones = (caught | (self.tick / self.tick_rate >= self.game_duration) |
+                 ~(self.gem_alive.any(axis=1) | self.power_up_alive.any(axis=1)))
+        if dones.any():
+            finished = np.flatnonzero(dones)
+            self.final_scores[finished] = self.score[finished]
+            self._reset_envs(finished)
+
+        return self._observe(), rewards, dones
+
+    def _observe(self):
+        """Fill and return the observation array (positions scaled to the map size)"""
+        observations = self._observations
+        width, height = self.game_map.width, self.game_map.height
+        player_x = self.player_x[:, None]
+        player_y = self.player_y[:, None]
+
+        observations[:, 0] = self.player_x / width
+        observations[:, 1] = self.player_y / height
+        power_left = self.power_up_duration - (self.tick - self.power_up_start_tick) / self.tick_rate
+        observations[:, 2] = np.where(self.power_up_active, power_left / self.power_up_duration, 0)
+        observations[:, 3] = 1 - self.tick / self.tick_rate / self.game_duration
+
+        column = 4
+        enemy_x = self.enemies.x.reshape(self.num_envs, self.enemy_count)
+        enemy_y = self.enemies.y.reshape(self.num_envs, self.enemy_count)
+        for xs, ys, present in ((enemy_x, enemy_y, self.enemy_alive),
+                                (self.gem_x, self.gem_y, self.gem_alive),
+                                (self.power_up_x, self.power_up_y, self.power_up_alive)):
+            count = present.shape[1]
+            observations[:, column:column + 3 * count:3] = (xs - player_x) / width
+            observations[:, column + 1:column + 3 * count:3] = (ys - player_y) / height
+            observations[:, column + 2:column + 3 * count:3] = present
+            column += 3 * count
+        return observations
@@ -0,0 +1,65 @@
+import pygame
+
+# What to do with a play when its sound is at its voice cap or no channel is free
+RETRIGGER = "retrigger"  # Restart the sound's oldest voice
+DROP = "drop"  # Ignore the new play
+
+class VoicePool:
+    """A fixed set of mixer channels shared by the sound effects
+
+    Every sound is registered with a cap on how many copies (voices) of it
+    may play at once. A play uses a free channel while the sound is under
+    its cap; otherwise the sound's policy decides whether its oldest voice
+    restarts or the play is dropped. The mixer never mixes more than
+    len(channels) effects, however fast play() is called.
+    """
+    def __init__(self, channel_ids):
+        self.channels = [pygame.mixer.Channel(channel_id) for channel_id in channel_ids]
+        self._sounds = {}  # name -> (sound, max_voices, policy)
+        self._voices = {}  # name -> [channel], oldest first
+
+    def register(self, name, sound, max_voices=1, policy=RETRIGGER):
+        """Make a sound playable by name (a None sound makes play() a no-op)"""
+        if policy not in (RETRIGGER, DROP):
+            raise ValueError(f"unknown voice policy {policy!r}")
+        self._sounds[name] = (sound, max_voices, policy)
+        self._voices[name] = []
+
+    def play(self, name):
+        """Start a voice of a registered sound; returns its channel, or None if dropped"""
+        sound, max_voices, policy = self._sounds[name]
+        if sound is None:
+            return None
+
+        # Forget voices that finished or had their channel taken
+        voices = self._voices[name]
+        voices[:] = [channel for channel in voices if channel.get_busy() and channel.get_sound() is sound]
+
+        channel = None
+        if len(voices) < max_voices:
+            channel = self._free_channel()
+        if channel is None:
+            if policy == DROP or not voices:
+                return None
+            channel = voices.pop(0)
+
+        channel.play(sound)
+        voices.append(channel)
+        return channel
+
+    def _free_channel(self):
+        for channel in self.channels:
+            if not channel.get_busy():
+                return channel
+        return None
+
+    def active_voices(self, name):
+        """Number of voices of a sound currently playing"""
+        sound = self._sounds[name][0]
+        return sum(1 for channel in self._voices[name] if channel.get_busy() and channel.get_sound() is sound)
+
+    def stop_all(self):
+        for channel in self.channels:
+            channel.stop()
+        for voices in self._voices.values():
+            voices.clear()